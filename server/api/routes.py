@@ -1,134 +1,293 @@
 
 # server/api/routes.py
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Response, Request
-from fastapi.responses import JSONResponse
-import random, base64, os, traceback, tempfile, logging
-import mimetypes
-from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio, json, base64, re, time, logging
+from typing import List, Optional
 
-import soundfile as sf
-from pydub import AudioSegment
-
-from core.audio import synthesize_speech
-from core.ai import transcribe_audio, similarity
+from core.admission import admission, admit
+from core.audio import get_cached_speech, speak, speech_audio_id
+from core.ai import transcribe_audio
 from core.config import settings
-from data.vocab import WordCategory, DifficultyLevel, VocabWord, get_all_words, get_words_by_category, get_words_by_difficulty, get_random_words, VOCAB, REV_VOCAB
+from core.executors import PoolSaturated, srs_pool, transcode_pool
+from core.logging_config import request_id_for, request_id_var
+from core.metrics import render_latest, stage, track_request
+from core.resilience import DeadlineExceeded, request_deadline
+from core.response_cache import json_bytes, response_cache
+from core.http_cache import IMMUTABLE_CACHE_CONTROL, RangeNotSatisfiable, etag_matches, parse_range, strong_etag
+from core.scheduler import SessionNotFound, scheduler
+from core.scoring import best_match, is_accepted
+from core.streaming import StreamingDecoder
+from core.transcode import PCM_SAMPLE_RATE, decode_pcm, determine_audio_format, encode_pcm, passthrough_filename
+from core.transcription_cache import audio_fingerprint, transcription_cache, upload_fingerprint
+from core.upload import UploadRejected, check_duration, read_audio_upload
+from core.vad import speech_bounds
+from data.normalize import normalize_answer
+from data.search import SEARCH_INDEX, InvalidCursor
+from data.vocab import WordCategory, DifficultyLevel, VocabWord, get_random_words, prompt_text, VOCAB, REV_VOCAB, VOCAB_INDEX
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# --- Added function for improved audio format detection ---
-import magic  # Ensure python-magic or python-magic-bin is installed
+AUDIO_ID_RE = re.compile(r"[0-9a-f]{64}")
 
-def determine_audio_format(file_content, filename=None, content_type=None):
-    """
-    Determine the audio format using multiple methods:
-    1. Check content_type
-    2. Try to detect from the file extension
-    3. Use python-magic to detect the file type from its content
-    """
-    format_from_content_type = None
-    format_from_extension = None
-    format_from_magic = None
-
-    if content_type:
-        format_from_content_type = content_type.split('/')[-1].lower()
-        if format_from_content_type == 'mp4':
-            format_from_content_type = 'm4a'
+def _audio_payload(request: Request, delivery: str, audio_bytes: bytes, text: str, language_code: str):
+    """Audio fields of a JSON response: inline base64 (the default, for existing clients) or a cacheable URL."""
+    if delivery == "url":
+        audio_id = speech_audio_id(text, language_code)
+        return {"audio_url": request.app.url_path_for("get_audio", audio_id=audio_id)}
+    with stage("base64_encode"):
+        return {"audio_base64": base64.b64encode(audio_bytes).decode("utf-8")}
+
+@router.get("/audio/{audio_id}", name="get_audio")
+async def get_audio(audio_id: str, request: Request):
+    """Serve synthesized speech as audio/mpeg with strong ETags, Range support and immutable caching."""
+    audio_bytes = get_cached_speech(audio_id) if AUDIO_ID_RE.fullmatch(audio_id) else None
+    if audio_bytes is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
     
-    if filename:
-        _, ext = os.path.splitext(filename)
-        if ext:
-            format_from_extension = ext[1:].lower()
+    etag = strong_etag(audio_bytes)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
     
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
     try:
-        mime = magic.Magic(mime=True)
-        detected_mime = mime.from_buffer(file_content[:4096])
-        if detected_mime.startswith('audio/'):
-            format_from_magic = detected_mime.split('/')[-1].lower()
-    except Exception as e:
-        logger.error(f"Error using magic to detect file type: {e}")
+        byte_range = parse_range(range_header, len(audio_bytes))
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(audio_bytes)}"})
     
-    logger.debug(f"Format detection: content_type={format_from_content_type}, extension={format_from_extension}, magic={format_from_magic}")
-    return format_from_magic or format_from_extension or format_from_content_type
+    if byte_range is None:
+        return Response(content=audio_bytes, media_type="audio/mpeg", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(audio_bytes)}"
+    return Response(content=audio_bytes[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
 
-@router.get("/next_word")
-async def next_word(
-    lang: str = Query("iw"),
-    category: str = Query(None, description="Filter by word category (noun, verb, etc.)"),
-    difficulty: str = Query(None, description="Filter by difficulty level (beginner, intermediate, advanced)"),
-    exclude: str = Query(None, description="Comma-separated list of Hebrew words to exclude")
-):
-    try:
-        word_category = None
-        difficulty_level = None
-        exclude_words = []
-        
-        if category:
-            try:
-                word_category = WordCategory(category)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid category: {category}")
-                
-        if difficulty:
-            try:
-                difficulty_level = DifficultyLevel(difficulty)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid difficulty level: {difficulty}")
-                
-        if exclude:
-            exclude_words = exclude.split(",")
-        
+def _parse_word_filters(category: str, difficulty: str, exclude: str):
+    """Validate next_word-style query filters into (category, difficulty, excluded Hebrew words)."""
+    word_category = None
+    difficulty_level = None
+    exclude_words = set()
+    
+    if category:
+        try:
+            word_category = WordCategory(category)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid category: {category}")
+            
+    if difficulty:
+        try:
+            difficulty_level = DifficultyLevel(difficulty)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid difficulty level: {difficulty}")
+            
+    if exclude:
+        exclude_words = set(exclude.split(","))
+    return word_category, difficulty_level, exclude_words
+
+def _select_words(count, word_category, difficulty_level, exclude_words):
+    with stage("vocab_select"):
         selected_words = get_random_words(
-            count=1,
+            count=count,
             category=word_category,
             difficulty=difficulty_level,
             exclude_words=exclude_words
         )
-        
+    
+    if not selected_words:
+        logger.warning(f"No words found with filters: category={word_category}, difficulty={difficulty_level}")
+        with stage("vocab_select"):
+            selected_words = get_random_words(count=count)
         if not selected_words:
-            logger.warning(f"No words found with filters: category={category}, difficulty={difficulty}")
-            selected_words = get_random_words(count=1)
-            if not selected_words:
-                raise HTTPException(status_code=404, detail="No vocabulary words available")
-        
-        selected_word = selected_words[0]
-        hebrew_word = selected_word.hebrew
-        english_meaning = selected_word.english
-        
-        if lang == "en":
-            text_for_tts = f"{english_meaning}?"
-            response_word = english_meaning
+            raise HTTPException(status_code=404, detail="No vocabulary words available")
+    return selected_words
+
+async def _learner_session(session_id: str):
+    try:
+        # A session not held in memory is loaded from SQLite, which may wait on another worker's write
+        with stage("srs"):
+            return await srs_pool.run(scheduler.get_session, session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+
+async def _session_words(session_id: str, count: int):
+    """Next words for a learner session, chosen by its spaced-repetition schedule."""
+    try:
+        # Picked under the learner's stored state, which other workers may have moved on
+        with stage("srs"):
+            selected_words = await srs_pool.run(scheduler.next_words, session_id, count)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    if not selected_words:
+        raise HTTPException(status_code=404, detail="No vocabulary words available")
+    return selected_words
+
+async def _record_review(session_id: str, word_obj, response):
+    """Feed a check_answer verdict into the session's schedule and attach the word's new review state."""
+    if not session_id or not word_obj or response.get("no_speech"):
+        return response
+    try:
+        with stage("srs"):
+            state = await srs_pool.run(
+                scheduler.record_result, session_id, word_obj, response["is_correct"], response["pronunciation_score"]
+            )
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return {**response, "review": state.to_dict()}
+
+def _prompt_for(word: VocabWord, lang: str):
+    """(word shown to the learner, text to synthesize) for a prompt in the given language."""
+    if lang == "en":
+        return word.english, prompt_text(word.english)
+    return word.hebrew, prompt_text(word.hebrew)
+
+def _word_response(request: Request, delivery: str, word: VocabWord, lang: str, prompt_audio: bytes):
+    response_word, text_for_tts = _prompt_for(word, lang)
+    return {
+        "word": response_word,
+        **_audio_payload(request, delivery, prompt_audio, text_for_tts, lang),
+        "audio_settings": settings.AUDIO_SETTINGS,
+        "metadata": {
+            "hebrew": word.hebrew,
+            "english": word.english,
+            "category": word.category,
+            "difficulty": word.difficulty,
+            "pronunciation_guide": word.pronunciation_guide,
+            "example_sentence": word.example_sentence
+        }
+    }
+
+@router.get("/next_word", dependencies=[Depends(request_deadline("next_word")), Depends(admit("next_word"))])
+async def next_word(
+    lang: str = Query("iw"),
+    category: str = Query(None, description="Filter by word category (noun, verb, etc.)"),
+    difficulty: str = Query(None, description="Filter by difficulty level (beginner, intermediate, advanced)"),
+    exclude: str = Query(None, description="Comma-separated list of Hebrew words to exclude"),
+    audio: str = Query("base64", pattern="^(base64|url)$", description="Inline audio as base64 or return an audio_url"),
+    session_id: str = Query(None, description="Learner session from POST /sessions; replaces category, difficulty and exclude"),
+    request: Request = None
+):
+    try:
+        if session_id:
+            selected_word = (await _session_words(session_id, 1))[0]
         else:
-            text_for_tts = f"{hebrew_word}?"
-            response_word = hebrew_word
+            word_category, difficulty_level, exclude_words = _parse_word_filters(category, difficulty, exclude)
+            selected_word = _select_words(1, word_category, difficulty_level, exclude_words)[0]
         
-        prompt_audio = synthesize_speech(text_for_tts, language_code=lang)
-        audio_base64 = base64.b64encode(prompt_audio).decode("utf-8")
-        logger.debug(f"Selected word: {hebrew_word}, lang={lang}, tts='{text_for_tts}'")
+        _, text_for_tts = _prompt_for(selected_word, lang)
+        with stage("tts"):
+            prompt_audio = await speak(text_for_tts, lang)
+        logger.debug("Selected word: %s, lang=%s, tts='%s'", selected_word.hebrew, lang, text_for_tts)
         
-        return JSONResponse({
-            "word": response_word,
-            "audio_base64": audio_base64,
-            "audio_settings": settings.AUDIO_SETTINGS,
-            "metadata": {
-                "hebrew": hebrew_word,
-                "english": english_meaning,
-                "category": selected_word.category,
-                "difficulty": selected_word.difficulty,
-                "pronunciation_guide": selected_word.pronunciation_guide,
-                "example_sentence": selected_word.example_sentence
-            }
-        })
+        return JSONResponse(_word_response(request, audio, selected_word, lang, prompt_audio))
+    except (HTTPException, PoolSaturated, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.exception("Error in next_word")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/next_words", dependencies=[Depends(request_deadline("next_words"))])
+async def next_words(
+    count: int = Query(10, ge=1, description="Number of words to prefetch"),
+    lang: str = Query("iw"),
+    category: str = Query(None, description="Filter by word category (noun, verb, etc.)"),
+    difficulty: str = Query(None, description="Filter by difficulty level (beginner, intermediate, advanced)"),
+    exclude: str = Query(None, description="Comma-separated list of Hebrew words to exclude"),
+    audio: str = Query("base64", pattern="^(base64|url)$", description="Inline audio as base64 or return an audio_url"),
+    session_id: str = Query(None, description="Learner session from POST /sessions; replaces category, difficulty and exclude"),
+    request: Request = None
+):
+    """Prefetch a batch of words as NDJSON, one line per word in the order their audio is ready."""
+    count = min(count, settings.MAX_PREFETCH_WORDS)
+    if session_id:
+        selected_words = await _session_words(session_id, count)
+    else:
+        word_category, difficulty_level, exclude_words = _parse_word_filters(category, difficulty, exclude)
+        selected_words = _select_words(count, word_category, difficulty_level, exclude_words)
+    
+    async def render(index, word):
+        _, text_for_tts = _prompt_for(word, lang)
+        try:
+            with stage("tts"):
+                prompt_audio = await speak(text_for_tts, lang)
+        except Exception as e:
+            logger.error(f"Prefetch synthesis failed for '{text_for_tts}': {e}")
+            return {"index": index, "word": word.hebrew, "error": str(e)}
+        return {"index": index, **_word_response(request, audio, word, lang, prompt_audio)}
+    
+    # Held until the stream ends, not just until the response starts
+    with stage("admission"):
+        ticket = await admission.acquire("next_words")
+    
+    async def stream():
+        tasks = []
+        try:
+            tasks = [asyncio.create_task(render(index, word)) for index, word in enumerate(selected_words)]
+            for next_ready in asyncio.as_completed(tasks):
+                item = await next_ready
+                yield (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+        finally:
+            # The client may disconnect mid-batch; don't keep synthesizing for nobody
+            for task in tasks:
+                task.cancel()
+            ticket.release()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.post("/sessions")
+async def create_session(
+    category: str = Query(None, description="Practice only this word category"),
+    difficulty: str = Query(None, description="Practice only this difficulty level"),
+    learner_id: str = Query(None, description="Stable learner id to carry review history across sessions"),
+):
+    """Start a learner session; pass its session_id to next_word(s) and check_answer."""
+    try:
+        word_category, difficulty_level, _ = _parse_word_filters(category, difficulty, None)
+        with stage("srs"):
+            session = await srs_pool.run(scheduler.create_session, word_category, difficulty_level, learner_id=learner_id)
+        return JSONResponse(session.snapshot(time.time()))
+    except (HTTPException, PoolSaturated):
+        raise
+    except Exception as e:
+        logger.exception("Error in create_session")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    try:
+        return JSONResponse((await _learner_session(session_id)).snapshot(time.time()))
+    except (HTTPException, PoolSaturated):
+        raise
+    except Exception as e:
+        logger.exception("Error in get_session")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _cached_json(request: Request, key, build):
+    """A read-only endpoint's JSON from the response cache: 304 for a current ETag, else the best encoding the client accepts."""
+    with stage("response_cache"):
+        return response_cache.get_or_build(key, lambda: json_bytes(build()), VOCAB_INDEX.version).response(request)
+
+def _vocabulary_page(words: List[VocabWord], total: int, next_cursor: Optional[str]) -> bytes:
+    """A /vocabulary page spliced together from the words' pre-serialized JSON."""
+    return b"".join((
+        b'{"total":', json_bytes(total),
+        b',"returned":', json_bytes(len(words)),
+        b',"words":[', b",".join(word.to_json() for word in words),
+        b'],"next_cursor":', json_bytes(next_cursor), b"}",
+    ))
+
 @router.get("/vocabulary/categories")
-async def get_categories():
+async def get_categories(request: Request):
     try:
-        return JSONResponse({
+        return _cached_json(request, "categories", lambda: {
             "categories": [category.value for category in WordCategory]
         })
     except Exception as e:
@@ -136,9 +295,9 @@ async def get_categories():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/vocabulary/difficulty_levels")
-async def get_difficulty_levels():
+async def get_difficulty_levels(request: Request):
     try:
-        return JSONResponse({
+        return _cached_json(request, "difficulty_levels", lambda: {
             "difficulty_levels": [level.value for level in DifficultyLevel]
         })
     except Exception as e:
@@ -147,256 +306,409 @@ async def get_difficulty_levels():
 
 @router.get("/vocabulary")
 async def get_vocabulary(
+    request: Request,
     category: str = Query(None, description="Filter by word category"),
     difficulty: str = Query(None, description="Filter by difficulty level"),
     search: str = Query(None, description="Search by Hebrew or English text"),
-    limit: int = Query(50, description="Maximum number of words to return")
+    limit: int = Query(50, ge=1, description="Maximum number of words to return"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's next_cursor")
 ):
     try:
-        words = get_all_words()
+        word_category = None
+        difficulty_level = None
         if category:
             try:
                 word_category = WordCategory(category)
-                words = [word for word in words if word.category == word_category]
             except ValueError:
                 raise HTTPException(status_code=400, detail=f"Invalid category: {category}")
         
         if difficulty:
             try:
                 difficulty_level = DifficultyLevel(difficulty)
-                words = [word for word in words if word.difficulty == difficulty_level]
             except ValueError:
                 raise HTTPException(status_code=400, detail=f"Invalid difficulty level: {difficulty}")
         
-        if search:
-            search = search.lower()
-            words = [
-                word for word in words 
-                if search in word.hebrew.lower() or search in word.english.lower()
-            ]
-        
-        limited_words = words[:limit]
-        result = [word.to_dict() for word in limited_words]
+        def page():
+            try:
+                with stage("vocab_search"):
+                    words, total, next_cursor = SEARCH_INDEX.search(
+                        search, category=word_category, difficulty=difficulty_level, limit=limit, cursor=cursor
+                    )
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return _vocabulary_page(words, total, next_cursor)
         
-        return JSONResponse({
-            "total": len(words),
-            "returned": len(limited_words),
-            "words": result
-        })
+        if search and search.strip():
+            # Search results are too many distinct queries to be worth keeping
+            return Response(page(), media_type="application/json")
+        # Browsing pages are a small set the client requests over and over
+        with stage("response_cache"):
+            cached = response_cache.get_or_build(
+                ("vocabulary", word_category, difficulty_level, limit, cursor), page, VOCAB_INDEX.version
+            )
+        return cached.response(request)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error in get_vocabulary")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/vocabulary/stats")
-async def get_vocabulary_stats():
+async def get_vocabulary_stats(request: Request):
     try:
-        all_words = get_all_words()
-        category_counts = {}
-        for category in WordCategory:
-            category_counts[category.value] = len([w for w in all_words if w.category == category])
-            
-        difficulty_counts = {}
-        for difficulty in DifficultyLevel:
-            difficulty_counts[difficulty.value] = len([w for w in all_words if w.difficulty == difficulty])
-            
-        combined_counts = {}
-        for category in WordCategory:
-            combined_counts[category.value] = {}
-            for difficulty in DifficultyLevel:
-                count = len([
-                    w for w in all_words 
-                    if w.category == category and w.difficulty == difficulty
-                ])
-                combined_counts[category.value][difficulty.value] = count
-                
-        return JSONResponse({
-            "total_words": len(all_words),
-            "by_category": category_counts,
-            "by_difficulty": difficulty_counts,
-            "by_category_and_difficulty": combined_counts
-        })
+        return _cached_json(request, "stats", VOCAB_INDEX.stats)
     except Exception as e:
         logger.exception("Error in get_vocabulary_stats")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/check_answer/{word:path}")
-async def check_answer(word: str, file: UploadFile = File(...), request: Request = None):
-    temp_files = []  # Track temp files for cleanup
+def _expected_answer(word: str):
+    """(vocabulary entry or None, expected spoken answer, transcription language) for a prompt word."""
+    word_obj = VOCAB_INDEX.lookup(word)
+    
+    if word_obj:
+        if word == word_obj.hebrew:
+            return word_obj, word_obj.english, "en"
+        return word_obj, word_obj.hebrew, "he"
+    if word in VOCAB:
+        return None, VOCAB[word], "en"
+    if word in REV_VOCAB:
+        return None, REV_VOCAB[word], "he"
+    raise HTTPException(status_code=400, detail=f"Unknown word: {word}")
+
+# Don't re-encode an upload to shave off less silence than this
+MIN_TRIM_MS = 300
+# Decoded past the duration limit, so a clip that is exactly at it isn't mistaken for an overlong one
+DECODE_SLACK_MS = 20
+
+def _trim_speech(pcm):
+    """The speech region of decoded PCM, or None if the clip has no speech."""
+    bounds = speech_bounds(pcm, PCM_SAMPLE_RATE)
+    if bounds is None:
+        return None
+    start, end = bounds
+    return pcm[start:end]
+
+def _no_speech_response(word_obj, correct_answer: str, language: str):
+    return {**_score_answer(word_obj, "", correct_answer, language), "no_speech": True}
+
+def _score_answer(word_obj, user_response: str, correct_answer: str, language: str):
+    """Score a transcription against every accepted answer for the word, keeping the closest."""
+    if word_obj:
+        variants = VOCAB_INDEX.variants(word_obj, language)
+    else:
+        variants = (normalize_answer(correct_answer, language),)
+    _, score = best_match(normalize_answer(user_response, language), variants)
+    is_correct = is_accepted(score)
+    pronunciation_score = int(score * 100)
+    
+    response = {
+        "user_response": user_response,
+        "is_correct": is_correct,
+        "correct_answer": correct_answer,
+        "pronunciation_score": pronunciation_score
+    }
+    
+    if word_obj:
+        response["metadata"] = {
+            "hebrew": word_obj.hebrew,
+            "english": word_obj.english,
+            "category": word_obj.category,
+            "difficulty": word_obj.difficulty,
+            "pronunciation_guide": word_obj.pronunciation_guide,
+            "example_sentence": word_obj.example_sentence
+        }
+    return response
+
+# check_answer reads its multipart body itself (see read_audio_upload); document the form it expects
+CHECK_ANSWER_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+@router.post("/check_answer/{word:path}", openapi_extra=CHECK_ANSWER_BODY, dependencies=[Depends(request_deadline("check_answer")), Depends(admit("check_answer"))])
+async def check_answer(
+    word: str,
+    request: Request,
+    session_id: str = Query(None, description="Learner session to update with the result")
+):
     try:
-        logger.debug(f"Received audio file: {file.filename}, content_type: {file.content_type}")
+        # Unknown words and sessions are refused before any of the upload is read
+        word_obj, correct_answer, transcription_language = _expected_answer(word)
+        if session_id:
+            await _learner_session(session_id)
         
-        content = await file.read()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as temp_file:
-            temp_filename = temp_file.name
-            temp_files.append(temp_filename)
-            temp_file.write(content)
-        
-        # Detect if this is an iOS device request based on file info
-        is_ios = (
-            file.content_type and 'quicktime' in file.content_type.lower() or
-            (file.filename and file.filename.lower().endswith(('.caf', '.m4a', '.mov'))) or
-            'iOS' in request.headers.get('User-Agent', '')
-        )
+        try:
+            with stage("upload_read"):
+                upload = await read_audio_upload(request)
+        except UploadRejected as rejected:
+            raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
+        content = upload.content
+        logger.debug("Received audio file: %s, content_type: %s, %d bytes", upload.filename, upload.content_type, len(content))
         
-        logger.debug(f"iOS device detected: {is_ios}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # Detect if this is an iOS device request based on file info
+            is_ios = (
+                upload.content_type and 'quicktime' in upload.content_type.lower() or
+                (upload.filename and upload.filename.lower().endswith(('.caf', '.m4a', '.mov'))) or
+                'iOS' in request.headers.get('User-Agent', '')
+            )
+            logger.debug("iOS device detected: %s", is_ios)
         
-        # Always convert the audio to ensure compatibility
-        # This is more robust than trying to detect the format
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as mp3_file:
-                converted_filename = mp3_file.name
-                temp_files.append(converted_filename)
-            
-            import subprocess
-            # Use more flexible ffmpeg parameters for iOS media
-            cmd = [
-                "ffmpeg", "-y", 
-                "-f", "auto",  # Auto-detect input format
-                "-i", temp_filename, 
-                "-acodec", "libmp3lame", 
-                "-ab", "128k", 
-                "-ac", "1",  # Convert to mono
-                "-ar", "44100",  # Standard sample rate
-                converted_filename
-            ]
+        # Client retries re-upload identical bytes; answer those without decoding anything
+        raw_key = upload_fingerprint(content, transcription_language)
+        user_response = transcription_cache.get(raw_key)
+        if user_response is None:
+            try:
+                with stage("decode"):
+                    # Decoding stops just past the limit, so an overlong upload costs no more than an accepted one
+                    pcm = await transcode_pool.run(decode_pcm, content, settings.UPLOAD_MAX_DURATION_MS + DECODE_SLACK_MS)
+            except PoolSaturated:
+                raise
+            except Exception as decode_error:
+                logger.error(f"Error decoding audio: {decode_error}")
+                raise HTTPException(status_code=500, detail=f"Failed to process audio file: {str(decode_error)}")
+            try:
+                check_duration(len(pcm) * 1000 // PCM_SAMPLE_RATE)
+            except UploadRejected as rejected:
+                raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
             
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
+            with stage("vad"):
+                speech = _trim_speech(pcm)
+            if speech is None:
+                logger.debug("No speech in %d ms upload, skipping transcription", len(pcm) * 1000 // PCM_SAMPLE_RATE)
+                return JSONResponse(_no_speech_response(word_obj, correct_answer, transcription_language))
+            trimmed = len(speech) < len(pcm) - PCM_SAMPLE_RATE * MIN_TRIM_MS // 1000
             
-            if process.returncode != 0:
-                logger.error(f"FFmpeg conversion failed: {stderr.decode()}")
-                # Fall back to pydub if ffmpeg fails
+            async def transcribe_upload():
+                try:
+                    if trimmed:
+                        # Only the speech region is uploaded
+                        with stage("transcode"):
+                            transcription_audio, transcription_filename = await transcode_pool.run(encode_pcm, speech)
+                        logger.debug("Trimmed upload to %d of %d ms", len(speech) * 1000 // PCM_SAMPLE_RATE, len(pcm) * 1000 // PCM_SAMPLE_RATE)
+                    else:
+                        # Send formats the transcription backend accepts as-is; re-encode everything else
+                        with stage("format_detection"):
+                            audio_format = determine_audio_format(
+                                content, upload.filename, upload.content_type, sniffed_format=upload.sniffed_format
+                            )
+                            upload_filename = passthrough_filename(upload.sniffed_format)
+                        if upload_filename:
+                            transcription_audio, transcription_filename = content, upload_filename
+                            logger.debug("Skipping transcoding for %s upload (%d bytes)", audio_format, len(content))
+                        else:
+                            # Already decoded above; encode that PCM rather than run ffmpeg on the upload again
+                            with stage("transcode"):
+                                transcription_audio, transcription_filename = await transcode_pool.run(encode_pcm, pcm)
+                            logger.debug("Encoded %s upload from decoded PCM: %d -> %d bytes", audio_format, len(content), len(transcription_audio))
+                except PoolSaturated:
+                    raise
+                except Exception as conversion_error:
+                    logger.error(f"Error converting audio: {conversion_error}")
+                    raise HTTPException(status_code=500, detail=f"Failed to process audio file: {str(conversion_error)}")
+                
                 try:
-                    from pydub import AudioSegment
-                    # Let pydub try to determine format automatically
-                    audio = AudioSegment.from_file(temp_filename)
-                    audio.export(converted_filename, format="mp3")
-                    logger.debug("Converted audio using pydub as fallback")
-                except Exception as pydub_error:
-                    logger.error(f"Pydub conversion also failed: {str(pydub_error)}")
-                    raise Exception(f"Audio conversion failed: {str(pydub_error)}")
+                    logger.debug("Transcribing %d bytes of audio, language: %s", len(transcription_audio), transcription_language)
+                    with stage("transcription"):
+                        return await transcribe_audio(
+                            transcription_audio, language=transcription_language, filename=transcription_filename
+                        )
+                except (PoolSaturated, DeadlineExceeded):
+                    raise
+                except Exception as e:
+                    logger.error(f"Transcription error: {str(e)}")
+                    raise HTTPException(status_code=500, detail=f"Failed to transcribe audio: {str(e)}")
             
-            logger.debug(f"Converted audio to MP3: {converted_filename}")
-            transcription_file = converted_filename
-        except Exception as conversion_error:
-            logger.error(f"Error converting audio: {conversion_error}")
-            raise HTTPException(status_code=500, detail=f"Failed to process audio file: {str(conversion_error)}")
+            # Keyed on the speech region, so the same answer with different padding still hits
+            user_response = await transcription_cache.get_or_transcribe(
+                audio_fingerprint(speech.tobytes(), transcription_language), transcribe_upload, aliases=(raw_key,)
+            )
         
-        all_words = get_all_words()
-        word_obj = next((w for w in all_words if w.hebrew == word or w.english == word), None)
-        
-        if word_obj:
-            if word == word_obj.hebrew:
-                correct_answer = word_obj.english
-                transcription_language = "en"
-            else:
-                correct_answer = word_obj.hebrew
-                transcription_language = "he"
-        else:
-            if word in VOCAB:
-                correct_answer = VOCAB[word]
-                transcription_language = "en"
-            elif word in REV_VOCAB:
-                correct_answer = REV_VOCAB[word]
-                transcription_language = "he"
-            else:
-                for temp_file in temp_files:
-                    try:
-                        os.unlink(temp_file)
-                    except:
-                        pass
-                raise HTTPException(status_code=400, detail=f"Unknown word: {word}")
-        
-        try:
-            logger.debug(f"Transcribing audio file: {transcription_file}, language: {transcription_language}")
-            user_response = transcribe_audio(transcription_file, language=transcription_language)
-        except Exception as e:
-            logger.error(f"Transcription error: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Failed to transcribe audio: {str(e)}")
-        
-        import re
-        def normalize_text(text):
-            return re.sub(r"[^\w\s]", "", text).strip().lower()
-        
-        normalized_user_response = normalize_text(user_response)
-        normalized_correct_answer = normalize_text(correct_answer)
-        score = similarity(normalized_user_response, normalized_correct_answer)
-        is_correct = score > 0.7
-        pronunciation_score = int(score * 100)
-        
-        response = {
-            "user_response": user_response,
-            "is_correct": is_correct,
-            "correct_answer": correct_answer,
-            "pronunciation_score": pronunciation_score
-        }
-        
-        if word_obj:
-            response["metadata"] = {
-                "hebrew": word_obj.hebrew,
-                "english": word_obj.english,
-                "category": word_obj.category,
-                "difficulty": word_obj.difficulty,
-                "pronunciation_guide": word_obj.pronunciation_guide,
-                "example_sentence": word_obj.example_sentence
-            }
-        return JSONResponse(response)
+        with stage("scoring"):
+            response = _score_answer(word_obj, user_response, correct_answer, transcription_language)
+        return JSONResponse(await _record_review(session_id, word_obj, response))
+    except (HTTPException, PoolSaturated, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.exception(f"Error in check_answer: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        for temp_file in temp_files:
+
+_stream_check_slots = asyncio.Semaphore(settings.STREAM_CHECK_MAX_SESSIONS)
+
+async def _transcribe_pcm(speech, language):
+    async def transcribe():
+        with stage("transcode"):
+            audio_bytes, filename = await transcode_pool.run(encode_pcm, speech)
+        with stage("transcription"):
+            return await transcribe_audio(audio_bytes, language=language, filename=filename)
+    return await transcription_cache.get_or_transcribe(audio_fingerprint(speech.tobytes(), language), transcribe)
+
+@router.websocket("/ws/check_answer/{word:path}")
+async def check_answer_stream(websocket: WebSocket, word: str, session_id: str = None):
+    """Streaming variant of check_answer.
+
+    The client sends recorded audio chunks as binary messages while the user speaks and a
+    text message "end" when it stops recording. Chunks are decoded as they arrive; when
+    the server hears the end of speech it sends {"type": "end_of_speech"} and starts
+    transcribing right away, so the {"type": "result", ...} message (same fields as
+    check_answer) can follow the "end" message almost immediately.
+    """
+    request_id_var.set(request_id_for(websocket.headers.get("X-Request-ID")))
+    await websocket.accept()
+    try:
+        word_obj, correct_answer, transcription_language = _expected_answer(word)
+        if session_id:
+            await _learner_session(session_id)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1008)
+        return
+    except PoolSaturated as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1013)
+        return
+    
+    if _stream_check_slots.locked():
+        await websocket.send_json({"type": "error", "detail": "Too many streaming checks in progress"})
+        await websocket.close(code=1013)
+        return
+    
+    async with _stream_check_slots:
+        with track_request(websocket.scope):
+            decoder = StreamingDecoder()
+            await decoder.start()
+            speculative = {}
+            
+            async def transcribe_on_end_of_speech():
+                await decoder.end_of_speech.wait()
+                pcm = decoder.pcm()
+                speculative["samples"] = len(pcm)
+                speech = _trim_speech(pcm)
+                if speech is not None:
+                    speculative["task"] = asyncio.create_task(_transcribe_pcm(speech, transcription_language))
+                await websocket.send_json({"type": "end_of_speech", "duration_ms": decoder.duration_ms})
+            
+            watcher = asyncio.create_task(transcribe_on_end_of_speech())
+            max_duration_ms = settings.AUDIO_SETTINGS["max_recording_time"]
             try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        return
+                    if message.get("bytes"):
+                        await decoder.feed(message["bytes"])
+                        if len(decoder.raw) > settings.UPLOAD_MAX_BYTES:
+                            await websocket.send_json({"type": "error", "detail": f"Upload is larger than {settings.UPLOAD_MAX_BYTES} bytes"})
+                            await websocket.close(code=1009)
+                            return
+                        if decoder.duration_ms >= max_duration_ms:
+                            break
+                    elif (message.get("text") or "").strip() == "end":
+                        break
+                
+                with stage("decode"):
+                    pcm = await decoder.finish()
+                logger.debug("Streamed %d bytes, decoded %d ms", len(decoder.raw), decoder.duration_ms)
+                
+                task = speculative.get("task")
+                last_speech = decoder.detector.last_speech_sample
+                if task is not None and last_speech is not None and last_speech <= speculative["samples"]:
+                    # Nothing was said after the end of speech we already transcribed
+                    user_response = await task
+                else:
+                    if task is not None:
+                        task.cancel()
+                    if not len(pcm):
+                        # The container couldn't be decoded incrementally (e.g. MP4); decode the whole upload
+                        pcm = await transcode_pool.run(decode_pcm, bytes(decoder.raw), max_duration_ms)
+                    speech = _trim_speech(pcm)
+                    if speech is None:
+                        await websocket.send_json(
+                            {"type": "result", **_no_speech_response(word_obj, correct_answer, transcription_language)}
+                        )
+                        await websocket.close()
+                        return
+                    user_response = await _transcribe_pcm(speech, transcription_language)
+                
+                with stage("scoring"):
+                    response = _score_answer(word_obj, user_response, correct_answer, transcription_language)
+                await websocket.send_json({"type": "result", **(await _record_review(session_id, word_obj, response))})
+                await websocket.close()
+            except WebSocketDisconnect:
+                pass
             except Exception as e:
-                logger.error(f"Error deleting temporary file {temp_file}: {str(e)}")
-@router.get("/get_audio_settings")
-async def get_audio_settings():
-    try:
-        return JSONResponse(settings.AUDIO_SETTINGS)
-    except Exception as e:
-        logger.exception("Error in get_audio_settings")
-        raise HTTPException(status_code=500, detail=str(e))
+                logger.exception(f"Error in check_answer_stream: {str(e)}")
+                try:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                    await websocket.close(code=1011)
+                except Exception:
+                    pass
+            finally:
+                watcher.cancel()
+                task = speculative.get("task")
+                if task is not None and not task.done():
+                    task.cancel()
+                await decoder.abort()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Stage latency histograms, cache and pool gauges in the Prometheus text format."""
+    return Response(render_latest(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @router.get("/get_audio_settings")
-async def get_audio_settings():
+async def get_audio_settings(request: Request):
     try:
-        return JSONResponse(settings.AUDIO_SETTINGS)
+        return _cached_json(request, "audio_settings", lambda: settings.AUDIO_SETTINGS)
     except Exception as e:
         logger.exception("Error in get_audio_settings")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/get_pronunciation")
-async def get_pronunciation(word: str = Query(...), lang: str = Query("iw")):
+@router.get("/get_pronunciation", dependencies=[Depends(request_deadline("get_pronunciation")), Depends(admit("get_pronunciation"))])
+async def get_pronunciation(
+    word: str = Query(...),
+    lang: str = Query("iw"),
+    audio: str = Query("base64", pattern="^(base64|url)$", description="Inline audio as base64 or return an audio_url"),
+    request: Request = None
+):
     try:
-        logger.debug(f"Pronunciation request received for word: '{word}', language: '{lang}'")
+        logger.debug("Pronunciation request received for word: '%s', language: '%s'", word, lang)
         if lang == "en":
             if word in VOCAB:
-                english_word = VOCAB[word]
-                logger.debug(f"Found Hebrew word in vocabulary, translating to English: '{english_word}'")
-                pronunciation_audio = synthesize_speech(english_word, language_code="en")
-                logger.debug(f"Generated ENGLISH pronunciation for '{english_word}'")
+                tts_text = VOCAB[word]
+                logger.debug("Found Hebrew word in vocabulary, translating to English: '%s'", tts_text)
             else:
-                logger.debug(f"Word not found in Hebrew vocabulary, trying direct pronunciation")
-                pronunciation_audio = synthesize_speech(word, language_code="en")
-                logger.debug(f"Generated direct English pronunciation for '{word}'")
+                logger.debug("Word not found in Hebrew vocabulary, trying direct pronunciation")
+                tts_text = word
         elif lang == "iw":
             if word in REV_VOCAB:
-                hebrew_word = REV_VOCAB[word]
-                logger.debug(f"Found English word in vocabulary, translating to Hebrew: '{hebrew_word}'")
-                pronunciation_audio = synthesize_speech(hebrew_word, language_code="iw")
-                logger.debug(f"Generated HEBREW pronunciation for '{hebrew_word}'")
+                tts_text = REV_VOCAB[word]
+                logger.debug("Found English word in vocabulary, translating to Hebrew: '%s'", tts_text)
             else:
-                logger.debug(f"Word not found in English vocabulary, trying direct pronunciation")
-                pronunciation_audio = synthesize_speech(word, language_code="iw")
-                logger.debug(f"Generated direct Hebrew pronunciation for '{word}'")
+                logger.debug("Word not found in English vocabulary, trying direct pronunciation")
+                tts_text = word
+        else:
+            raise HTTPException(status_code=400, detail=f"Unsupported language: {lang}")
+        
+        with stage("tts"):
+            pronunciation_audio = await speak(tts_text, lang)
+        logger.debug("Generated %s pronunciation for '%s'", lang, tts_text)
         
-        audio_base64 = base64.b64encode(pronunciation_audio).decode("utf-8")
         return JSONResponse({
             "word": word,
-            "audio_base64": audio_base64
+            **_audio_payload(request, audio, pronunciation_audio, tts_text, lang)
         })
+    except (HTTPException, PoolSaturated, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.exception(f"Error in get_pronunciation for word: {word}, lang: {lang}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,279 @@
+# server/benchmarks/load_bench.py
+"""
+Offline load test for the API.
+
+Runs the FastAPI app in-process behind httpx's ASGI transport, with gTTS and the
+transcription backend replaced by deterministic local stubs of configurable latency,
+so no network access or API spend is involved. A pool of concurrent clients drives
+a weighted mix of next_word, vocabulary search, vocabulary stats and check_answer
+uploads (fixture clips generated up front), then throughput and p50/p95/p99 latency
+per endpoint are compared against benchmarks/baseline.json.
+
+    python -m benchmarks.load_bench [--requests 2000] [--concurrency 16]
+    python -m benchmarks.load_bench --save-baseline
+
+Exits with status 1 when an endpoint's p50 or p95 latency regresses by more than
+--tolerance relative to the baseline. Throughput is shown but not gated, since it
+follows from the request count and concurrency as much as from the code. A baseline
+saved with a different run configuration (--requests, --concurrency, --mix, stub
+latencies, ...) is not compared against at all. Baselines are machine specific;
+save one on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+DEFAULT_MIX = "next_word=40,search=20,stats=10,check_answer=30"
+# Options that change what the numbers mean; a baseline is only comparable with the same values
+RUN_CONFIG_KEYS = (
+    "requests", "concurrency", "mix", "tts_latency_ms", "whisper_latency_ms",
+    "whisper_jitter_ms", "cold_tts", "fixtures", "seed",
+)
+# Latency percentiles a run is gated on
+GATED_PERCENTILES = ("p50_ms", "p95_ms")
+SEARCH_TERMS = ["ma", "to", "בי", "good", "שׁ", "hello", "תּוֹ", "o", "night", "xyz"]
+
+# MPEG-2 layer III, 32 kbps, 16 kHz: 144-byte frames of 36 ms
+_MP3_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(140)
+
+class StubTTS:
+    """Drop-in for gTTS: sleeps for the configured latency and returns silent MP3 frames."""
+
+    latency_ms = 0.0
+
+    def __init__(self, text, lang="iw", slow=False, timeout=None):
+        self.text = text
+        time.sleep(self.latency_ms / 1000)
+
+    def write_to_fp(self, fp):
+        # Roughly 80 ms of audio per character, like a short spoken prompt
+        fp.write(_MP3_FRAME * max(4, len(self.text) * 2))
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"next_word", "search", "stats", "check_answer"}
+    if unknown:
+        raise SystemExit(f"Unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+def build_fixtures(count, seed):
+    """(filename, content type, bytes) clips: a tone between stretches of silence, as WAV and WebM/Opus."""
+    import numpy as np
+    import soundfile as sf
+
+    rng = random.Random(seed)
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+    fixtures = []
+    sample_rate = 16000
+    for index in range(count):
+        lead, speech, tail = (rng.uniform(0.3, 1.5) for _ in range(3))
+        t = np.arange(int(speech * sample_rate)) / sample_rate
+        tone = 0.3 * np.sin(2 * np.pi * rng.uniform(180, 320) * t)
+        samples = np.concatenate([np.zeros(int(lead * sample_rate)), tone, np.zeros(int(tail * sample_rate))])
+        # A faint noise floor, different per clip, so no two fixtures decode to the same PCM
+        samples += np.random.default_rng(seed + index).normal(0, 0.001, len(samples))
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, sample_rate, format="WAV", subtype="PCM_16")
+        wav = buffer.getvalue()
+        if have_ffmpeg and index % 2:
+            process = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+                 "-c:a", "libopus", "-b:a", "32k", "-f", "webm", "pipe:1"],
+                input=wav, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            )
+            if process.returncode == 0:
+                fixtures.append(("recording.webm", "audio/webm", process.stdout))
+                continue
+        fixtures.append(("recording.wav", "audio/wav", wav))
+    return fixtures
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+async def run_load(args):
+    import httpx
+    from core.app import create_app
+    from core.transcription import FakeTranscriptionBackend, set_backend
+    from data.vocab import VOCABULARY_DATA
+
+    app = create_app()
+    set_backend(FakeTranscriptionBackend(text="man", latency_ms=args.whisper_latency_ms, jitter_ms=args.whisper_jitter_ms))
+    fixtures = build_fixtures(args.fixtures, args.seed)
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    rng = random.Random(args.seed)
+    plan = rng.choices(names, weights=weights, k=args.requests)
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    next_index = 0
+
+    async def issue(client, endpoint):
+        if endpoint == "next_word":
+            return await client.get("/api/next_word", params={"lang": rng.choice(["iw", "en"])})
+        if endpoint == "search":
+            return await client.get("/api/vocabulary", params={"search": rng.choice(SEARCH_TERMS), "limit": 20})
+        if endpoint == "stats":
+            return await client.get("/api/vocabulary/stats")
+        word = rng.choice(VOCABULARY_DATA).hebrew
+        filename, content_type, content = rng.choice(fixtures)
+        return await client.post(f"/api/check_answer/{word}", files={"file": (filename, content, content_type)})
+
+    async def worker(client):
+        nonlocal next_index
+        while next_index < len(plan):
+            endpoint = plan[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await issue(client, endpoint)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies[endpoint].append(time.perf_counter() - started)
+            if not ok:
+                errors[endpoint] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+            # Warm up imports, pools and caches so the measurement reflects steady state
+            for endpoint in names:
+                await issue(client, endpoint)
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+    results = {}
+    for endpoint in names:
+        values = sorted(latencies[endpoint])
+        results[endpoint] = {
+            "requests": len(values),
+            "errors": errors[endpoint],
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    results["total"] = {
+        "requests": len(plan),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(plan) / elapsed, 2),
+        "elapsed_s": round(elapsed, 3),
+    }
+    return results
+
+def run_config(args):
+    return {key: getattr(args, key) for key in RUN_CONFIG_KEYS}
+
+def config_differences(config, baseline_config):
+    """'name=value (baseline value)' for every run option that differs from the baseline's."""
+    return [
+        f"{key}={config[key]!r} (baseline {baseline_config.get(key)!r})"
+        for key in RUN_CONFIG_KEYS
+        if baseline_config.get(key) != config[key]
+    ]
+
+def compare(results, baseline, tolerance):
+    """Print a table against the baseline; returns the list of regressions found."""
+    regressions = []
+    print(f"{'endpoint':<14}{'req':>6}{'err':>5}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}   vs baseline")
+    for endpoint, stats in results.items():
+        if endpoint == "total":
+            continue
+        base = baseline.get(endpoint)
+        notes = []
+        if base:
+            for key in GATED_PERCENTILES:
+                if base.get(key) and stats[key] > base[key] * (1 + tolerance):
+                    notes.append(f"{key[:-3]} {stats[key] / base[key] - 1:+.0%}")
+            if stats["errors"] > base.get("errors", 0):
+                notes.append(f"{stats['errors']} errors")
+        regressions += [f"{endpoint}: {note}" for note in notes]
+        status = "REGRESSED " + ", ".join(notes) if notes else ("ok" if base else "no baseline")
+        print(
+            f"{endpoint:<14}{stats['requests']:>6}{stats['errors']:>5}{stats['throughput_rps']:>10}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}   {status}"
+        )
+    total = results["total"]
+    print(f"{'total':<14}{total['requests']:>6}{total['errors']:>5}{total['throughput_rps']:>10}   in {total['elapsed_s']}s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--tts-latency-ms", type=float, default=150.0, help="stub gTTS latency per uncached phrase")
+    parser.add_argument("--whisper-latency-ms", type=float, default=400.0, help="stub transcription latency")
+    parser.add_argument("--whisper-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--cold-tts", action="store_true", help="disable the TTS cache so every prompt is synthesized")
+    parser.add_argument("--fixtures", type=int, default=32, help="distinct check_answer clips")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    args = parser.parse_args()
+
+    # Settings are read at import, so isolate state and pick stub backends before loading the app
+    workdir = tempfile.mkdtemp(prefix="studai-bench-")
+    os.environ["TTS_CACHE_DIR"] = "" if args.cold_tts else os.path.join(workdir, "tts")
+    os.environ["TTS_MANIFEST_PATH"] = os.path.join(workdir, "manifest.json")
+    if args.cold_tts:
+        os.environ["TTS_CACHE_MAX_MEMORY_BYTES"] = "0"
+    os.environ["SRS_DB_PATH"] = os.path.join(workdir, "srs.sqlite3")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import core.audio
+    from core.logging_config import configure_logging
+    configure_logging()
+    StubTTS.latency_ms = args.tts_latency_ms
+    core.audio.gTTS = StubTTS
+
+    try:
+        results = asyncio.run(run_load(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    config = run_config(args)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        differences = config_differences(config, saved.get("config", {}))
+        if differences:
+            print("Not comparing with the baseline, which was saved with other options: " + ", ".join(differences))
+        else:
+            baseline = saved.get("results", {})
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": results}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if regressions:
+        print("Regressions: " + "; ".join(regressions))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
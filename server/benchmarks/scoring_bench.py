@@ -0,0 +1,76 @@
+# server/benchmarks/scoring_bench.py
+"""
+Micro-benchmark for answer scoring.
+
+Compares the original check_answer scoring (regex compiled per call plus
+difflib.SequenceMatcher against the single expected answer) with core.scoring
+matching against every precomputed variant, over transcription-like responses
+for the whole vocabulary.
+
+    python -m benchmarks.scoring_bench [--rounds 200] [--noise 0.2]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+
+from core.scoring import best_match, is_accepted
+from data.normalize import normalize_answer
+from data.vocab import VOCAB_INDEX
+
+def legacy_score(user_response, correct_answer):
+    normalize = lambda text: re.sub(r"[^\w\s]", "", text).strip().lower()
+    return SequenceMatcher(None, normalize(user_response), normalize(correct_answer)).ratio()
+
+def variant_score(word, user_response, language):
+    _, score = best_match(normalize_answer(user_response, language), VOCAB_INDEX.variants(word, language))
+    return score
+
+def garble(text, noise, rng):
+    """Simulate transcription errors by substituting or dropping characters."""
+    chars = []
+    for char in text:
+        roll = rng.random()
+        if roll < noise / 2:
+            continue
+        chars.append(rng.choice("aeioustrn") if roll < noise else char)
+    return "".join(chars)
+
+def build_cases(noise, seed):
+    rng = random.Random(seed)
+    cases = []
+    for word in VOCAB_INDEX.words:
+        # English prompt answered in Hebrew, and Hebrew prompt answered in English
+        cases.append((word, word.hebrew, "he", word.hebrew))
+        for part in word.english.split("/"):
+            cases.append((word, word.english, "en", f"The {part}."))
+            cases.append((word, word.english, "en", garble(part, noise, rng)))
+    return cases
+
+def run(label, fn, cases, rounds):
+    started = time.perf_counter()
+    accepted = 0
+    for _ in range(rounds):
+        for case in cases:
+            accepted += is_accepted(fn(case))
+    elapsed = time.perf_counter() - started
+    calls = rounds * len(cases)
+    print(f"{label:>10}: {elapsed * 1e6 / calls:7.2f} us/answer, accepted {accepted / rounds:.0f}/{len(cases)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.2, help="per-character error rate of garbled responses")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    cases = build_cases(args.noise, args.seed)
+    print(f"{len(cases)} responses x {args.rounds} rounds")
+    run("difflib", lambda case: legacy_score(case[3], case[1]), cases, args.rounds)
+    run("variants", lambda case: variant_score(case[0], case[3], case[2]), cases, args.rounds)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, Optional
+
+from core.config import settings
+from core.executors import PoolSaturated
+from core.metrics import stage
+from core.resilience import parse_named_numbers, remaining
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """Who gets a freed slot first; lower values win."""
+    CRITICAL = 0     # an answer check: the learner is waiting on the result
+    NORMAL = 1       # the next word to show
+    SPECULATIVE = 2  # prefetch batches and pronunciation replays, which the client can do without
+
+# Expensive endpoints and the class their requests wait in
+ENDPOINT_PRIORITIES = {
+    "check_answer": Priority.CRITICAL,
+    "next_word": Priority.NORMAL,
+    "next_words": Priority.SPECULATIVE,
+    "get_pronunciation": Priority.SPECULATIVE,
+}
+
+# Service time assumed for an endpoint before any request to it has finished
+INITIAL_SERVICE_SECONDS = 0.5
+# Weight of the latest request in the running service time average
+SERVICE_TIME_ALPHA = 0.2
+
+class Overloaded(PoolSaturated):
+    """Raised when a request is shed by admission control; answered with 503 and Retry-After."""
+
+    def __init__(self, endpoint: str, reason: str, retry_after: float):
+        super().__init__(endpoint, f"{endpoint} is overloaded ({reason}), retry later", max(1, math.ceil(retry_after)))
+        self.reason = reason
+
+class _Waiter:
+    __slots__ = ("endpoint", "priority", "seq", "future", "enqueued_at")
+
+    def __init__(self, endpoint, priority, seq, future):
+        self.endpoint = endpoint
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+class Ticket:
+    """An admitted request's slot; release() it exactly once when the work is done (extra calls are no-ops)."""
+
+    def __init__(self, controller, endpoint):
+        self._controller = controller
+        self.endpoint = endpoint
+        self.started_at = time.perf_counter()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self)
+
+class AdmissionController:
+    """Concurrency budgets with a bounded, priority-ordered wait queue for the expensive endpoints.
+
+    Each endpoint may run at most its budget of requests at once, and all of them
+    together at most max_concurrent. A request that can't start waits in a queue shared
+    by every endpoint and ordered by priority class, then arrival, so a freed slot goes
+    to an answer check before a prefetch. Instead of queueing without bound the
+    controller sheds with Overloaded (503 + Retry-After):
+
+    - right away, when the wait estimated from the endpoint's recent service time and
+      the requests queued ahead would exceed the class's max wait;
+    - when the queue is full, unless a lower-priority waiter can be shed to make room;
+    - when a request has waited its class's max wait (or the rest of its time budget,
+      if that is shorter) without getting a slot.
+
+    Runs on the event loop; not thread-safe.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, budgets: Dict[str, int], max_wait_ms: Dict[str, int]):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.budgets = dict(budgets)
+        self.max_wait = {
+            priority: max_wait_ms.get(priority.name.lower(), 1000) / 1000 for priority in Priority
+        }
+        self._in_flight: Dict[str, int] = {}
+        self._total_in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._service_time: Dict[str, float] = {}
+        self.stats = {"admitted": {}, "queued": {}, "shed": {}}
+
+    def _count(self, kind: str, key):
+        counts = self.stats[kind]
+        counts[key] = counts.get(key, 0) + 1
+
+    def _can_start(self, endpoint: str) -> bool:
+        return (
+            self._total_in_flight < self.max_concurrent
+            and self._in_flight.get(endpoint, 0) < self.budgets.get(endpoint, self.max_concurrent)
+        )
+
+    def _start(self, endpoint: str) -> Ticket:
+        self._in_flight[endpoint] = self._in_flight.get(endpoint, 0) + 1
+        self._total_in_flight += 1
+        self._count("admitted", endpoint)
+        return Ticket(self, endpoint)
+
+    def _estimated_wait(self, endpoint: str, priority: Priority) -> float:
+        """Seconds until a new request would start: its turn behind the same endpoint's waiters of equal or higher priority."""
+        ahead = sum(1 for w in self._waiters if w.endpoint == endpoint and w.priority <= priority)
+        budget = max(1, min(self.budgets.get(endpoint, self.max_concurrent), self.max_concurrent))
+        rounds = ahead // budget + 1
+        return rounds * self._service_time.get(endpoint, INITIAL_SERVICE_SECONDS)
+
+    def _shed(self, endpoint: str, reason: str, retry_after: float) -> Overloaded:
+        self._count("shed", (endpoint, reason))
+        logger.debug("Shedding %s request: %s", endpoint, reason)
+        return Overloaded(endpoint, reason, retry_after)
+
+    async def acquire(self, endpoint: str, priority: Optional[Priority] = None) -> Ticket:
+        """Wait for a slot on `endpoint`; raises Overloaded if the request is shed instead."""
+        priority = ENDPOINT_PRIORITIES.get(endpoint, Priority.NORMAL) if priority is None else priority
+        # Every release hands freed slots to the queue first, so a slot free now is free for anyone
+        if self._can_start(endpoint):
+            return self._start(endpoint)
+
+        max_wait = self.max_wait[priority]
+        budget = remaining()
+        if budget is not None:
+            # No use waiting for a slot past the request's own deadline
+            max_wait = min(max_wait, budget)
+        estimate = self._estimated_wait(endpoint, priority)
+        if estimate > max_wait:
+            raise self._shed(endpoint, "queue wait over deadline", estimate)
+        if len(self._waiters) >= self.max_queue:
+            victim = max(self._waiters, key=lambda w: (w.priority, w.seq))
+            if victim.priority <= priority:
+                raise self._shed(endpoint, "queue full", estimate)
+            self._waiters.remove(victim)
+            victim.future.set_exception(
+                self._shed(victim.endpoint, "displaced by higher priority", self._estimated_wait(victim.endpoint, victim.priority))
+            )
+
+        waiter = _Waiter(endpoint, priority, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._waiters.sort(key=lambda w: (w.priority, w.seq))
+        self._count("queued", endpoint)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), max_wait)
+        except BaseException as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            future = waiter.future
+            if not future.done():
+                future.cancel()
+            elif not future.cancelled() and future.exception() is None:
+                # Granted just as the wait timed out or the request was cancelled; pass the slot on
+                future.result().release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._shed(endpoint, "waited past deadline", self._estimated_wait(endpoint, priority)) from None
+            raise
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str, priority: Optional[Priority] = None):
+        """Hold a slot on `endpoint` for the duration of the block."""
+        ticket = await self.acquire(endpoint, priority)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _release(self, ticket: Ticket):
+        endpoint = ticket.endpoint
+        self._in_flight[endpoint] -= 1
+        self._total_in_flight -= 1
+        elapsed = time.perf_counter() - ticket.started_at
+        previous = self._service_time.get(endpoint)
+        self._service_time[endpoint] = elapsed if previous is None else previous + SERVICE_TIME_ALPHA * (elapsed - previous)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start queued requests, highest priority first, while their endpoints have room."""
+        for waiter in list(self._waiters):
+            if self._total_in_flight >= self.max_concurrent:
+                break
+            if waiter.future.done() or not self._can_start(waiter.endpoint):
+                continue
+            self._waiters.remove(waiter)
+            waiter.future.set_result(self._start(waiter.endpoint))
+
+    def snapshot(self):
+        return {
+            "in_flight": dict(self._in_flight),
+            "waiting": {endpoint: sum(1 for w in self._waiters if w.endpoint == endpoint) for endpoint in self.budgets},
+            "budgets": dict(self.budgets),
+            "service_time_avg": dict(self._service_time),
+            "admitted": dict(self.stats["admitted"]),
+            "queued": dict(self.stats["queued"]),
+            "shed": dict(self.stats["shed"]),
+        }
+
+def admit(endpoint: str, priority: Optional[Priority] = None):
+    """A route dependency that holds a slot on `endpoint` until the response is ready.
+
+    Not for streamed responses, whose bodies are produced after dependencies exit;
+    acquire() a ticket and release it when the stream ends instead.
+    """
+    async def hold_slot():
+        with stage("admission"):
+            ticket = await admission.acquire(endpoint, priority)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+    return hold_slot
+
+admission = AdmissionController(
+    settings.ADMISSION_MAX_CONCURRENT,
+    settings.ADMISSION_MAX_QUEUE,
+    {name: int(budget) for name, budget in parse_named_numbers(settings.ADMISSION_BUDGETS).items()},
+    parse_named_numbers(settings.ADMISSION_MAX_WAIT_MS),
+)
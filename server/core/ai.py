@@ -1,15 +1,15 @@
-
-import openai
-from difflib import SequenceMatcher
-from core.config import settings
-
-openai.api_key = settings.OPENAI_API_KEY
-
-def transcribe_audio(filename, language="he"):
-    with open(filename, "rb") as audio_file:
-        transcription = openai.Audio.transcribe("whisper-1", audio_file, language=language)
-    return transcription["text"].strip()
-
-def similarity(a, b):
-    return SequenceMatcher(None, a, b).ratio()
-
+from core.executors import transcribe_pool
+from core.resilience import transcription_guard
+from core.transcription import get_backend
+
+async def transcribe_audio(audio: bytes, language="he", filename="audio.mp3", timeout=None):
+    """Transcribe in-memory audio with the configured backend; the filename tells it which container it is.
+
+    The call gets what is left of the request's deadline (at most `timeout`), is hedged
+    when it runs slow and goes through the transcription circuit breaker.
+    """
+    backend = get_backend()
+    return await transcription_guard.call(
+        lambda budget: transcribe_pool.run_async(backend.transcribe, audio, language, filename, timeout=budget),
+        timeout=timeout,
+    )
@@ -1,10 +1,18 @@
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from api import router as api_router
 from core.config import settings
+from core.executors import PoolSaturated, STAGE_POOLS
+from core.resilience import DeadlineExceeded
 from core.middleware import log_requests
+from core.scheduler import scheduler
 from core.shutdown import setup_signal_handlers
+from core.startup import startup_phase, warm_up
+from core.transcription import close_backend
+from core.tts_cache import tts_cache
 import logging
 
 def create_app() -> FastAPI:
@@ -25,6 +33,17 @@ def create_app() -> FastAPI:
         max_age=86400,
     )
 
+    # Shed work when a blocking stage's pool is full or admission control turns it away,
+    # rather than queueing without bound
+    @app.exception_handler(PoolSaturated)
+    async def pool_saturated_handler(request, exc: PoolSaturated):
+        return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": str(exc.retry_after)})
+
+    # A TTS or transcription call outlived the request's time budget
+    @app.exception_handler(DeadlineExceeded)
+    async def deadline_exceeded_handler(request, exc: DeadlineExceeded):
+        return JSONResponse({"detail": str(exc)}, status_code=504)
+
     # Include API routes
     app.include_router(api_router, prefix="/api")
 
@@ -33,7 +52,31 @@ def create_app() -> FastAPI:
     async def list_routes():
         return {"routes": [{"path": r.path, "name": r.name, "methods": list(r.methods)} for r in app.routes if hasattr(r, "methods")]}
 
-    # Setup signal handlers
-    setup_signal_handlers()
+    # Preload pre-rendered TTS audio (see prerender_tts.py) so first requests skip synthesis
+    @app.on_event("startup")
+    async def preload_tts_audio():
+        with startup_phase("startup: tts manifest"):
+            tts_cache.load_manifest(settings.TTS_MANIFEST_PATH)
+
+    @app.on_event("startup")
+    async def install_signal_handlers():
+        if settings.HANDLE_SIGNALS:
+            setup_signal_handlers()
+
+    # Heavy dependencies load on first use; warm them in the background rather than on a user's request
+    @app.on_event("startup")
+    async def start_warm_up():
+        if settings.STARTUP_WARMUP:
+            app.state.warm_up_task = asyncio.create_task(warm_up())
+
+    @app.on_event("shutdown")
+    async def shutdown_stage_pools():
+        warm_up_task = getattr(app.state, "warm_up_task", None)
+        if warm_up_task is not None:
+            warm_up_task.cancel()
+        for pool in STAGE_POOLS:
+            pool.shutdown()
+        await close_backend()
+        scheduler.store.close()
 
     return app
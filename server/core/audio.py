@@ -1,14 +1,111 @@
 import io
-import numpy as np
-from gtts import gTTS
 import os
+from core.config import settings
+from core.executors import tts_pool
+from core.resilience import tts_guard
+from core.tts_cache import tts_cache, tts_cache_key
 
-def synthesize_speech(text, language_code="iw"):
-    """Generate speech from text"""
-    tts = gTTS(text=text, lang=language_code, slow=False)
+# gtts.gTTS, imported on first synthesis since it pulls in requests and its dependencies
+gTTS = None
+
+def _tts_engine():
+    global gTTS
+    if gTTS is None:
+        from gtts import gTTS as engine
+        gTTS = engine
+    return gTTS
+
+def speech_audio_id(text, language_code="iw", slow=False):
+    """Stable id of the audio synthesize_speech returns for these arguments"""
+    return tts_cache_key(text, language_code, slow=slow)
+
+def get_cached_speech(audio_id):
+    """Previously synthesized audio by id, or None if it isn't cached"""
+    return tts_cache.get(audio_id)
+
+def synthesize_speech(text, language_code="iw", slow=False, timeout=None):
+    """Generate speech from text, serving repeated phrases from the TTS cache
+
+    timeout bounds each request gTTS makes (TTS_TIMEOUT by default), so a hung upstream
+    can't hold a TTS pool thread after the caller has given up on it.
+    """
+    cached = tts_cache.get(speech_audio_id(text, language_code, slow=slow))
+    if cached is not None:
+        return cached
+    return _fill(text, language_code, slow, timeout)
+
+def _fill(text, language_code="iw", slow=False, timeout=None):
+    """Synthesize a phrase whose (counted) cache lookup missed, unless another thread or worker fills it first"""
+    key = speech_audio_id(text, language_code, slow=slow)
+    with tts_cache.fill_lock(key):
+        # Another thread or worker may have synthesized it while we waited for the lock
+        cached = tts_cache.peek(key)
+        if cached is not None:
+            return cached
+        return _synthesize_and_store(text, language_code, slow, timeout)
+
+def _synthesize_and_store(text, language_code="iw", slow=False, timeout=None):
+    """Synthesize and cache without the fill lock; hedged calls must not queue behind the call they hedge"""
+    tts = _tts_engine()(text=text, lang=language_code, slow=slow, timeout=timeout or settings.TTS_TIMEOUT)
     audio_io = io.BytesIO()
     tts.write_to_fp(audio_io)
-    return audio_io.getvalue()
+    audio = audio_io.getvalue()
+    tts_cache.put(speech_audio_id(text, language_code, slow=slow), audio)
+    return audio
+
+async def speak(text, language_code="iw", slow=False):
+    """synthesize_speech on the TTS pool, within the request's deadline, hedged and behind the TTS circuit breaker.
+
+    Cached audio is served even while the breaker is open; only misses fail fast then.
+    """
+    cached = tts_cache.get(speech_audio_id(text, language_code, slow=slow))
+    if cached is not None:
+        return cached
+    return await tts_guard.call(
+        lambda timeout: tts_pool.run(_fill, text, language_code, slow, timeout),
+        timeout=settings.TTS_TIMEOUT,
+        hedge=lambda timeout: tts_pool.run(_synthesize_and_store, text, language_code, slow, timeout),
+    )
+
+_MP3_BITRATES = {
+    "v1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    "v2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def mp3_duration_ms(data):
+    """Duration of an MPEG layer III stream (what gTTS emits), by walking frame headers"""
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        # Skip the ID3v2 tag; its size is a 28-bit synchsafe integer
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size
+
+    samples = 0
+    sample_rate = None
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+            pos += 1
+            continue
+        version = (b1 >> 3) & 0x03
+        layer = (b1 >> 1) & 0x03
+        bitrate_index = (b2 >> 4) & 0x0F
+        rate_index = (b2 >> 2) & 0x03
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+        bitrate = _MP3_BITRATES["v1" if version == 3 else "v2"][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        padding = (b2 >> 1) & 0x01
+        frame_samples = 1152 if version == 3 else 576
+        frame_length = (frame_samples // 8) * bitrate // sample_rate + padding
+        samples += frame_samples
+        pos += frame_length
+
+    if not sample_rate:
+        return None
+    return int(samples * 1000 / sample_rate)
 
 def get_audio_as_base64(filename):
     """Convert audio file to base64 string"""
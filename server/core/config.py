@@ -6,6 +6,19 @@ load_dotenv()
 class Settings:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+
+    # Speech-to-text backend: "openai" (pooled HTTP client), "fake" (offline stand-in) or "local" (faster-whisper)
+    TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai")
+    TRANSCRIPTION_API_BASE = os.getenv("TRANSCRIPTION_API_BASE", "https://api.openai.com/v1")
+    TRANSCRIPTION_TIMEOUT = float(os.getenv("TRANSCRIPTION_TIMEOUT", "15"))
+    TRANSCRIPTION_MAX_RETRIES = int(os.getenv("TRANSCRIPTION_MAX_RETRIES", "2"))
+    FAKE_TRANSCRIPTION_TEXT = os.getenv("FAKE_TRANSCRIPTION_TEXT", "")
+    FAKE_TRANSCRIPTION_LATENCY_MS = int(os.getenv("FAKE_TRANSCRIPTION_LATENCY_MS", "300"))
+    FAKE_TRANSCRIPTION_JITTER_MS = int(os.getenv("FAKE_TRANSCRIPTION_JITTER_MS", "0"))
+    LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "base")
+    # Transcriptions are cached by decoded-audio fingerprint so client retries don't hit Whisper again
+    TRANSCRIPTION_CACHE_TTL = float(os.getenv("TRANSCRIPTION_CACHE_TTL", "600"))
+    TRANSCRIPTION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", "2048"))
     # Expanded CORS origins to ensure all development environments are covered
     CORS_ORIGINS = [
         "http://localhost:3000",
@@ -17,6 +30,14 @@ class Settings:
         "*"  # Allow all origins - only for development, remove in production
     ]
     
+    # Logging: root level, per-logger overrides ("api.routes=DEBUG,core.transcode=WARNING"),
+    # "json" or "text" records, and a per-call-site cap on DEBUG records per second (0 = no cap)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_DEBUG_RATE_PER_SECOND = float(os.getenv("LOG_DEBUG_RATE_PER_SECOND", "20"))
+    
     # Audio recording settings
     AUDIO_SETTINGS = {
         "silence_threshold": 15,     # Higher value = less sensitive to background noise (0-100)
@@ -25,4 +46,90 @@ class Settings:
         "max_recording_time": 8000,  # Maximum recording time in ms
     }
 
+    # check_answer uploads: bytes read before answering 413, and the longest recording accepted
+    # (clients stop at max_recording_time; the extra second covers encoder padding)
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+    UPLOAD_MAX_DURATION_MS = int(os.getenv("UPLOAD_MAX_DURATION_MS", str(AUDIO_SETTINGS["max_recording_time"] + 1000)))
+
+    # Minimum similarity (1 - normalized edit distance) to the closest accepted answer
+    ANSWER_MATCH_THRESHOLD = float(os.getenv("ANSWER_MATCH_THRESHOLD", "0.7"))
+
+    # TTS audio cache: in-memory LRU bounded by bytes, backed by an on-disk store
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "tts"))
+    TTS_CACHE_MAX_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MAX_MEMORY_BYTES", str(32 * 1024 * 1024)))
+    # Written by prerender_tts.py and loaded at startup so cold instances skip synthesis
+    TTS_MANIFEST_PATH = os.getenv("TTS_MANIFEST_PATH", os.path.join(TTS_CACHE_DIR, "manifest.json"))
+
+    # Longest gTTS may wait on Google for each request it makes, when the request's own budget doesn't say less
+    TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "10"))
+
+    # Dedicated pools for blocking stages: concurrent workers and how many more calls may wait
+    TTS_POOL_WORKERS = int(os.getenv("TTS_POOL_WORKERS", "4"))
+    TTS_POOL_QUEUE = int(os.getenv("TTS_POOL_QUEUE", "32"))
+    TRANSCODE_POOL_WORKERS = int(os.getenv("TRANSCODE_POOL_WORKERS", str(os.cpu_count() or 2)))
+    TRANSCODE_POOL_QUEUE = int(os.getenv("TRANSCODE_POOL_QUEUE", "16"))
+    TRANSCRIBE_POOL_WORKERS = int(os.getenv("TRANSCRIBE_POOL_WORKERS", "8"))
+    TRANSCRIBE_POOL_QUEUE = int(os.getenv("TRANSCRIBE_POOL_QUEUE", "16"))
+    # Learner-state SQLite calls; each process has one connection, so they run one at a time
+    SRS_POOL_WORKERS = int(os.getenv("SRS_POOL_WORKERS", "1"))
+    SRS_POOL_QUEUE = int(os.getenv("SRS_POOL_QUEUE", "64"))
+
+    # Admission control for the expensive endpoints: requests in progress across all of them,
+    # how many more may wait for a slot, each endpoint's own concurrency budget, and per
+    # priority class the longest a request may wait before it is shed with 503
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "48"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_BUDGETS = os.getenv("ADMISSION_BUDGETS", "check_answer=24,next_word=16,next_words=4,get_pronunciation=8")
+    ADMISSION_MAX_WAIT_MS = os.getenv("ADMISSION_MAX_WAIT_MS", "critical=5000,normal=2000,speculative=500")
+
+    # Time budget per request (ms) for the endpoints that call TTS or transcription; backend
+    # calls get what is left of it and the request fails with 504 when it runs out
+    REQUEST_BUDGETS_MS = os.getenv("REQUEST_BUDGETS_MS", "check_answer=15000,next_word=6000,next_words=10000,get_pronunciation=6000")
+    # Hedged backend calls: a duplicate is sent once a call has taken longer than this percentile
+    # of the backend's recent latencies (0 = never hedge), but never sooner than HEDGE_MIN_DELAY_MS
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "50"))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+    # Circuit breaker per backend: opens when at least BREAKER_FAILURE_RATE of the last BREAKER_WINDOW
+    # calls (once BREAKER_MIN_CALLS are in) failed or took longer than the backend's BREAKER_SLOW_CALL_MS,
+    # then refuses calls for BREAKER_OPEN_SECONDS before letting a probe through
+    BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+    BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_MS = os.getenv("BREAKER_SLOW_CALL_MS", "tts=4000,transcription=10000")
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "10"))
+
+    # Concurrent /ws/check_answer sessions; each holds an ffmpeg decoder open while the user speaks
+    STREAM_CHECK_MAX_SESSIONS = int(os.getenv("STREAM_CHECK_MAX_SESSIONS", "32"))
+
+    # Install our own SIGINT/SIGTERM handlers; gunicorn.conf.py turns this off since the process manager owns signals
+    HANDLE_SIGNALS = os.getenv("HANDLE_SIGNALS", "true").lower() in ("1", "true", "yes")
+
+    # Import the audio/speech libraries in the background once the app is up, instead of on the first request
+    STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() in ("1", "true", "yes")
+
+    # Compiled binary form of data/vocabulary.json, rebuilt when the JSON changes (empty = always parse the JSON)
+    VOCAB_SNAPSHOT_PATH = os.getenv("VOCAB_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "vocabulary.snapshot"))
+
+    # Serialized, compressed bodies kept for the read-only vocabulary endpoints (per query)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+    # Upper bound on words per /next_words prefetch batch
+    MAX_PREFETCH_WORDS = int(os.getenv("MAX_PREFETCH_WORDS", "20"))
+
+    # Uploads above this many bytes are spooled to a temp file for ffmpeg instead of piped through memory
+    TRANSCODE_SPOOL_THRESHOLD = int(os.getenv("TRANSCODE_SPOOL_THRESHOLD", str(4 * 1024 * 1024)))
+    # Codec for decoded speech sent to the transcription backend: "opus" (smallest), "mp3" or "flac" (lossless)
+    TRANSCODE_CODEC = os.getenv("TRANSCODE_CODEC", "opus")
+    # Containers sent to the transcription backend untouched
+    TRANSCRIPTION_PASSTHROUGH_FORMATS = set(os.getenv("TRANSCRIPTION_PASSTHROUGH_FORMATS", "webm,ogg,m4a,mp3,wav").split(","))
+
+    # Spaced-repetition learner state (sessions and per-word review history)
+    SRS_DB_PATH = os.getenv("SRS_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "srs.sqlite3"))
+    # Sessions kept in memory with their selection trees; older ones reload from SQLite on demand
+    SRS_MAX_ACTIVE_SESSIONS = int(os.getenv("SRS_MAX_ACTIVE_SESSIONS", "1024"))
+    # How many most recently shown words a session keeps out of rotation
+    SRS_RECENT_WINDOW = int(os.getenv("SRS_RECENT_WINDOW", "5"))
+
 settings = Settings()
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PoolSaturated(Exception):
+    """Raised when a stage pool's queue is full and the work is rejected."""
+    def __init__(self, pool_name, message=None, retry_after=1):
+        super().__init__(message or f"{pool_name} pool is saturated")
+        self.pool_name = pool_name
+        # Seconds a client should wait before retrying (the Retry-After header)
+        self.retry_after = retry_after
+
+class StagePool:
+    """A dedicated, bounded executor for one pipeline stage.
+
+    At most `max_workers` calls run at once and at most `max_queue` more may wait;
+    anything beyond that is rejected with PoolSaturated instead of piling up.
+    Blocking callables go through run() on a thread pool; coroutines through
+    run_async() under the same limits and counters. The executor is created on
+    first use so the pool is safe to import before a fork.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "queue_time_total": 0.0,
+            "queue_time_max": 0.0,
+        }
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-pool",
+                    )
+        return self._executor
+
+    def _admit(self):
+        with self._lock:
+            if self._queued + self._active >= self.max_workers + self.max_queue:
+                self.stats["rejected"] += 1
+                raise PoolSaturated(self.name)
+            self._queued += 1
+            self.stats["submitted"] += 1
+        return time.perf_counter()
+
+    def _start(self, enqueued_at):
+        waited = time.perf_counter() - enqueued_at
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self.stats["queue_time_total"] += waited
+            self.stats["queue_time_max"] = max(self.stats["queue_time_max"], waited)
+
+    def _forget(self):
+        """Take a call that never started off the queue."""
+        with self._lock:
+            self._queued -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking callable on this pool without blocking the event loop."""
+        enqueued_at = self._admit()
+
+        def task():
+            self._start(enqueued_at)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        try:
+            future = self._get_executor().submit(task)
+        except BaseException:
+            self._forget()
+            raise
+        # A caller cancelled while the call is still queued (a lost hedge, a disconnect) cancels
+        # the work item, which then never reaches _start() to take itself off the queue
+        future.add_done_callback(lambda f: f.cancelled() and self._forget())
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:
+            with self._lock:
+                self.stats["failed"] += 1
+            raise
+        with self._lock:
+            self.stats["completed"] += 1
+        return result
+
+    async def run_async(self, fn, *args, **kwargs):
+        """Await a coroutine function under this pool's concurrency and queue limits."""
+        enqueued_at = self._admit()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        started = False
+        try:
+            async with self._semaphore:
+                self._start(enqueued_at)
+                started = True
+                try:
+                    result = await fn(*args, **kwargs)
+                finally:
+                    with self._lock:
+                        self._active -= 1
+        except BaseException as e:
+            with self._lock:
+                if not started:
+                    self._queued -= 1
+                if isinstance(e, Exception):
+                    self.stats["failed"] += 1
+            raise
+        with self._lock:
+            self.stats["completed"] += 1
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            started = self.stats["submitted"] - self._queued
+            return {
+                **self.stats,
+                "queued": self._queued,
+                "active": self._active,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_time_avg": self.stats["queue_time_total"] / started if started else 0.0,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+tts_pool = StagePool("tts", settings.TTS_POOL_WORKERS, settings.TTS_POOL_QUEUE)
+transcode_pool = StagePool("transcode", settings.TRANSCODE_POOL_WORKERS, settings.TRANSCODE_POOL_QUEUE)
+transcribe_pool = StagePool("transcribe", settings.TRANSCRIBE_POOL_WORKERS, settings.TRANSCRIBE_POOL_QUEUE)
+srs_pool = StagePool("srs", settings.SRS_POOL_WORKERS, settings.SRS_POOL_QUEUE)
+
+STAGE_POOLS = [tts_pool, transcode_pool, transcribe_pool, srs_pool]
+
+def pool_stats():
+    return {pool.name: pool.snapshot() for pool in STAGE_POOLS}
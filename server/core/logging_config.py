@@ -1,12 +1,175 @@
-
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from core.config import settings
+
+# Set per request by the middleware and stamped onto every record logged while handling it
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# A caller's X-Request-ID is kept only if it is short and plain enough to put in logs
+REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+def request_id_for(header_value=None) -> str:
+    """The caller's request id if usable, otherwise a fresh one."""
+    if header_value and REQUEST_ID_RE.fullmatch(header_value):
+        return header_value
+    return uuid.uuid4().hex[:16]
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class DebugRateLimitFilter(logging.Filter):
+    """Token bucket per call site for records below INFO.
+
+    Each logging call site may emit up to `rate` records per second (bursts up to the
+    same number); the rest are dropped, and the next record that gets through carries
+    how many were suppressed.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._buckets = {}  # (logger, line) -> [tokens, last refill, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.INFO or self.rate <= 0:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.rate, now, 0]
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the listener thread; never block the caller when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render the message and traceback now, while the arguments are still valid, but
+        # keep them apart so formatters on the listener side can place the traceback
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s [%(request_id)s] - %(message)s"
+
+_listener = None
+
+def parse_logger_levels(spec: str):
+    """'api.routes=INFO,core.transcode=WARNING' -> {"api.routes": "INFO", "core.transcode": "WARNING"}."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+def _start_pipeline():
+    global _listener
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(DebugRateLimitFilter(settings.LOG_DEBUG_RATE_PER_SECOND))
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in parse_logger_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
 
 def configure_logging():
-    """Configure global logging settings."""
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
-    )
+    """Configure global logging settings.
+
+    Records are filtered and stamped with the request id in the calling thread, then
+    written to stderr by a background listener thread so request handlers never wait
+    on log I/O.
+    """
+    if _listener is not None:
+        _listener.stop()
+    _start_pipeline()
+    atexit.register(shutdown_logging)
+
     logger = logging.getLogger(__name__)
     logger.info(f"Configured log level: {logging.getLevelName(logger.getEffectiveLevel())}")
     return logger
+
+def _restart_after_fork():
+    # The listener thread doesn't survive fork() and the old queue's locks may be held
+    # by it; a pre-forked worker starts its own queue and listener
+    if _listener is not None:
+        _start_pipeline()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,210 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Labeled latency histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if slot < len(self.buckets):
+                series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count]) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            base = _format_labels(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(zip(self.labelnames, labels), le=_format_value(bound))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(zip(self.labelnames, labels), le='+Inf')} {count}")
+            lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs: Iterable[Tuple[str, str]], **extra) -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in [*pairs, *extra.items()]]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """A counter or gauge family from (labels, value) samples."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels.items())} {_format_value(value)}")
+    return lines
+
+REQUEST_SECONDS = Histogram(
+    "studai_request_duration_seconds", "End-to-end HTTP request latency.", ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram(
+    "studai_stage_duration_seconds", "Latency of each pipeline stage within an endpoint.", ("route", "stage")
+)
+
+class RequestTimings:
+    """Stage durations collected while one request or WebSocket session is handled."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        STAGE_SECONDS.observe(seconds, self.route, stage)
+        # A stage that runs more than once (e.g. TTS for a batch) adds up
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def route_template(scope) -> str:
+    """The matched route's path template, keeping metric labels bounded (e.g. /api/check_answer/{word:path})."""
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@contextmanager
+def track_request(scope):
+    """Collect stage timings for everything run in this context (tasks it spawns included)."""
+    timings = RequestTimings(route_template(scope))
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one stage of the current request; a no-op outside of one."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(name, time.perf_counter() - started)
+
+def _component_samples():
+    # Imported here so instrumented modules can import this one without cycles
+    from core.admission import admission
+    from core.executors import pool_stats
+    from core.resilience import guard_stats
+    from core.response_cache import response_cache
+    from core.transcription_cache import transcription_cache
+    from core.tts_cache import tts_cache
+    from data.search import SEARCH_INDEX
+
+    lines = []
+    caches = {"tts": tts_cache.snapshot(), "transcription": transcription_cache.snapshot(), "response": response_cache.snapshot()}
+    lines += render_family("studai_cache_hits_total", "counter", "Cache hits by cache and tier.", [
+        ({"cache": "tts", "tier": "memory"}, caches["tts"]["memory_hits"]),
+        ({"cache": "tts", "tier": "disk"}, caches["tts"]["disk_hits"]),
+        ({"cache": "transcription", "tier": "memory"}, caches["transcription"]["hits"]),
+        ({"cache": "transcription", "tier": "in_flight"}, caches["transcription"]["coalesced"]),
+        ({"cache": "search", "tier": "memory"}, SEARCH_INDEX.stats["cache_hits"]),
+        ({"cache": "response", "tier": "memory"}, caches["response"]["hits"]),
+    ])
+    lines += render_family("studai_cache_misses_total", "counter", "Cache misses by cache.", [
+        ({"cache": "tts"}, caches["tts"]["misses"]),
+        ({"cache": "transcription"}, caches["transcription"]["misses"]),
+        ({"cache": "search"}, SEARCH_INDEX.stats["cache_misses"]),
+        ({"cache": "response"}, caches["response"]["misses"]),
+    ])
+    lines += render_family("studai_cache_evictions_total", "counter", "Entries evicted to stay within bounds.", [
+        ({"cache": "tts"}, caches["tts"]["evictions"]),
+        ({"cache": "transcription"}, caches["transcription"]["evictions"]),
+        ({"cache": "response"}, caches["response"]["evictions"]),
+    ])
+    lines += render_family("studai_cache_entries", "gauge", "Entries currently held in memory.", [
+        ({"cache": "tts"}, caches["tts"]["memory_entries"]),
+        ({"cache": "transcription"}, caches["transcription"]["entries"]),
+        ({"cache": "response"}, caches["response"]["entries"]),
+    ])
+    lines += render_family("studai_tts_cache_memory_bytes", "gauge", "Bytes of audio in the TTS memory tier.", [
+        ({}, caches["tts"]["memory_bytes"]),
+    ])
+
+    pools = pool_stats()
+    for name, kind, key, help_text in [
+        ("studai_pool_queued", "gauge", "queued", "Calls waiting for a stage pool worker."),
+        ("studai_pool_active", "gauge", "active", "Calls currently running on a stage pool."),
+        ("studai_pool_max_workers", "gauge", "max_workers", "Configured stage pool concurrency."),
+        ("studai_pool_queue_wait_avg_seconds", "gauge", "queue_time_avg", "Mean time calls waited for a worker."),
+        ("studai_pool_queue_wait_max_seconds", "gauge", "queue_time_max", "Longest time a call waited for a worker."),
+        ("studai_pool_completed_total", "counter", "completed", "Stage pool calls that finished."),
+        ("studai_pool_failed_total", "counter", "failed", "Stage pool calls that raised."),
+        ("studai_pool_rejected_total", "counter", "rejected", "Calls rejected because the pool was saturated."),
+    ]:
+        lines += render_family(name, kind, help_text, [({"pool": pool}, stats[key]) for pool, stats in pools.items()])
+
+    guards = guard_stats()
+    for name, key, help_text in [
+        ("studai_backend_calls_total", "calls", "Calls made to a TTS or transcription backend (hedges not included)."),
+        ("studai_backend_failures_total", "failures", "Backend calls that raised."),
+        ("studai_backend_deadline_exceeded_total", "deadline_exceeded", "Backend calls abandoned at the request deadline."),
+        ("studai_backend_hedges_total", "hedges", "Duplicate calls sent because the first ran slow."),
+        ("studai_backend_hedge_wins_total", "hedge_wins", "Hedged calls answered by the duplicate first."),
+        ("studai_circuit_opened_total", "opened", "Times a backend's circuit breaker opened."),
+        ("studai_circuit_rejected_total", "rejected", "Calls refused while a circuit breaker was open."),
+    ]:
+        lines += render_family(name, "counter", help_text, [({"backend": backend}, stats[key]) for backend, stats in guards.items()])
+    lines += render_family("studai_circuit_state", "gauge", "Circuit breaker state (0 closed, 1 half-open, 2 open).", [
+        ({"backend": backend}, ("closed", "half_open", "open").index(stats["state"])) for backend, stats in guards.items()
+    ])
+    lines += render_family("studai_backend_hedge_delay_seconds", "gauge", "Current delay before a call is hedged.", [
+        ({"backend": backend}, stats["hedge_delay"]) for backend, stats in guards.items() if stats["hedge_delay"] is not None
+    ])
+
+    gate = admission.snapshot()
+    for name, kind, key, help_text in [
+        ("studai_admission_in_flight", "gauge", "in_flight", "Admitted requests in progress per endpoint."),
+        ("studai_admission_waiting", "gauge", "waiting", "Requests queued for an admission slot."),
+        ("studai_admission_budget", "gauge", "budgets", "Configured concurrency budget per endpoint."),
+        ("studai_admission_admitted_total", "counter", "admitted", "Requests given an admission slot."),
+    ]:
+        lines += render_family(name, kind, help_text, [({"endpoint": endpoint}, value) for endpoint, value in gate[key].items()])
+    lines += render_family("studai_admission_shed_total", "counter", "Requests shed with 503 by admission control.", [
+        ({"endpoint": endpoint, "reason": reason}, count) for (endpoint, reason), count in gate["shed"].items()
+    ])
+    return lines
+
+def render_latest() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines = REQUEST_SECONDS.render() + STAGE_SECONDS.render() + _component_samples()
+    return "\n".join(lines) + "\n"
@@ -1,12 +1,29 @@
 
 import logging
+import time
 from fastapi import Request
 
+from core.logging_config import request_id_for, request_id_var
+from core.metrics import REQUEST_SECONDS, track_request
+
 logger = logging.getLogger(__name__)
 
 async def log_requests(request: Request, call_next):
     """Middleware to log requests and responses."""
-    logger.debug(f"Request: {request.method} {request.url}")
-    response = await call_next(request)
-    logger.debug(f"Response status: {response.status_code}")
-    return response
+    request_id = request_id_for(request.headers.get("X-Request-ID"))
+    token = request_id_var.set(request_id)
+    try:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request: %s %s", request.method, request.url.path)
+        started = time.perf_counter()
+        with track_request(request.scope) as timings:
+            response = await call_next(request)
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, request.method, timings.route, str(response.status_code))
+        # Stages of streamed bodies (next_words) finish after this and only reach the histograms
+        response.headers["Server-Timing"] = timings.server_timing(total=elapsed)
+        response.headers["X-Request-ID"] = request_id
+        logger.debug("Response status: %s", response.status_code)
+        return response
+    finally:
+        request_id_var.reset(token)
@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.config import settings
+from core.executors import PoolSaturated
+
+logger = logging.getLogger(__name__)
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget runs out before a backend answered; answered with 504."""
+
+class CircuitOpen(PoolSaturated):
+    """Raised without calling a backend whose circuit breaker is open; answered with 503 and Retry-After."""
+
+    def __init__(self, backend: str, retry_after: float):
+        super().__init__(backend, f"{backend} backend is unavailable, retry later", max(1, math.ceil(retry_after)))
+
+def parse_named_numbers(spec: str) -> Dict[str, float]:
+    """'check_answer=12000,next_word=5000' -> {"check_answer": 12000.0, "next_word": 5000.0}."""
+    values = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        values[name.strip()] = float(value)
+    return values
+
+# Monotonic time by which the current request must be answered, or None for no budget
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+REQUEST_BUDGETS = {name: ms / 1000 for name, ms in parse_named_numbers(settings.REQUEST_BUDGETS_MS).items()}
+
+def request_deadline(endpoint: str):
+    """A route dependency that starts the endpoint's time budget (REQUEST_BUDGETS_MS).
+
+    Backend calls made for the request, including from tasks it spawns and the body of
+    a streamed response, then get whatever is left of it. The request's task ends with
+    the request, so the value is never reset.
+    """
+    budget = REQUEST_BUDGETS.get(endpoint)
+
+    async def start_budget():
+        if budget:
+            _deadline.set(time.monotonic() + budget)
+    return start_budget
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget (possibly negative), or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+class LatencyWindow:
+    """Latencies of a backend's most recent successful calls."""
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percentile: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+class CircuitBreaker:
+    """Stops calling a backend that keeps failing or answering too slowly.
+
+    Closed: calls go through, and the outcomes of the last `window` calls are kept. Once
+    at least `min_calls` are in and the share of failed or slower-than-`slow_call`
+    calls reaches `failure_rate`, it opens. Open: calls are refused with CircuitOpen
+    for `open_seconds`. Half-open: one probe call goes through; its success closes the
+    breaker, its failure opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float, slow_call: float, open_seconds: float):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)  # True for a failed or slow call
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go through now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                waited = time.monotonic() - self._opened_at
+                if waited < self.open_seconds:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(self.name, self.open_seconds - waited)
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(self.name, 1)
+                self._probing = True
+
+    def record(self, ok: bool, seconds: float):
+        bad = not ok or seconds > self.slow_call
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if bad:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"{self.name} circuit closed")
+                return
+            self._outcomes.append(bad)
+            if (
+                self.state == self.CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) >= self.failure_rate * len(self._outcomes)
+            ):
+                self._open()
+
+    def release_probe(self):
+        """A half-open probe ended without an outcome (e.g. the request was cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.stats["opened"] += 1
+        logger.warning(f"{self.name} circuit opened for {self.open_seconds:g}s")
+
+class BackendGuard:
+    """Deadlines, hedging and a circuit breaker around one slow external backend.
+
+    call() runs an attempt with the time left in the request's budget (capped by
+    `timeout`). If it hasn't answered after the backend's recent HEDGE_PERCENTILE
+    latency, a duplicate attempt is started and the first to succeed wins; the other is
+    cancelled. Running out of budget raises DeadlineExceeded, and failures, timeouts
+    and slow calls feed the circuit breaker, which refuses calls with CircuitOpen while
+    the backend is unhealthy. Saturated pools and cancelled requests say nothing about
+    the backend and aren't counted.
+    """
+
+    def __init__(self, name: str, breaker: CircuitBreaker):
+        self.name = name
+        self.breaker = breaker
+        self.latencies = LatencyWindow(settings.HEDGE_WINDOW)
+        self.stats = {"calls": 0, "failures": 0, "deadline_exceeded": 0, "hedges": 0, "hedge_wins": 0}
+
+    def count(self, stat: str):
+        self.stats[stat] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        if settings.HEDGE_PERCENTILE <= 0:
+            return None
+        delay = self.latencies.percentile(settings.HEDGE_PERCENTILE, settings.HEDGE_MIN_SAMPLES)
+        return None if delay is None else max(delay, settings.HEDGE_MIN_DELAY_MS / 1000)
+
+    def _budget(self, timeout: Optional[float]) -> Optional[float]:
+        budget = remaining()
+        if budget is None:
+            return timeout
+        return budget if timeout is None else min(budget, timeout)
+
+    async def call(
+        self,
+        attempt: Callable[[Optional[float]], Awaitable],
+        timeout: Optional[float] = None,
+        hedge: Optional[Callable[[Optional[float]], Awaitable]] = None,
+    ):
+        """Await attempt(seconds left, or None without a budget), hedged with hedge(...) (default: attempt again)."""
+        budget = self._budget(timeout)
+        if budget is not None and budget <= 0:
+            self.count("deadline_exceeded")
+            raise DeadlineExceeded(f"No time left to call {self.name}")
+        self.breaker.before_call()
+        self.count("calls")
+
+        started = time.monotonic()
+        deadline = None if budget is None else started + budget
+        hedge_delay = self.hedge_delay()
+        hedge_at = None if hedge_delay is None else started + hedge_delay
+        primary = asyncio.ensure_future(attempt(budget))
+        running = {primary: started}
+        errors = []
+        try:
+            while running:
+                wake = min((t for t in (deadline, hedge_at) if t is not None), default=None)
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=None if wake is None else max(0.0, wake - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    task_started = running.pop(task)
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        continue
+                    elapsed = time.monotonic() - task_started
+                    self.latencies.add(elapsed)
+                    self.breaker.record(True, elapsed)
+                    if task is not primary:
+                        self.count("hedge_wins")
+                    return task.result()
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                if hedge_at is not None and now >= hedge_at and running:
+                    hedge_at = None
+                    self.count("hedges")
+                    logger.debug("Hedging %s call after %.0f ms", self.name, hedge_delay * 1000)
+                    running[asyncio.ensure_future((hedge or attempt)(None if deadline is None else deadline - now))] = now
+        except BaseException:
+            # Cancelled with the request: no verdict on the backend
+            self.breaker.release_probe()
+            raise
+        finally:
+            for task in running:
+                task.cancel()
+
+        elapsed = time.monotonic() - started
+        if running:
+            self.count("deadline_exceeded")
+            self.breaker.record(False, elapsed)
+            raise DeadlineExceeded(f"{self.name} did not answer within {budget:.1f}s")
+        # A hedge turned away by a saturated pool says nothing about the backend; report the real failure
+        error = next((e for e in errors if not isinstance(e, PoolSaturated)), errors[0])
+        if isinstance(error, PoolSaturated):
+            self.breaker.release_probe()
+        else:
+            self.count("failures")
+            self.breaker.record(False, elapsed)
+        raise error
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            **self.breaker.stats,
+            "state": self.breaker.state,
+            "hedge_delay": self.hedge_delay(),
+        }
+
+def _guard(name: str) -> BackendGuard:
+    return BackendGuard(name, CircuitBreaker(
+        name,
+        window=settings.BREAKER_WINDOW,
+        min_calls=settings.BREAKER_MIN_CALLS,
+        failure_rate=settings.BREAKER_FAILURE_RATE,
+        slow_call=parse_named_numbers(settings.BREAKER_SLOW_CALL_MS).get(name, math.inf) / 1000,
+        open_seconds=settings.BREAKER_OPEN_SECONDS,
+    ))
+
+tts_guard = _guard("tts")
+transcription_guard = _guard("transcription")
+
+BACKEND_GUARDS = [tts_guard, transcription_guard]
+
+def guard_stats():
+    return {guard.name: guard.snapshot() for guard in BACKEND_GUARDS}
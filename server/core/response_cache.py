@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+from starlette.responses import Response
+
+from core.config import settings
+from core.http_cache import etag_matches
+
+try:
+    import orjson
+except ImportError:  # Encoded with the standard library instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Only gzip variants are kept
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Smaller bodies aren't worth a Content-Encoding (and gzip framing can make them bigger)
+MIN_COMPRESS_BYTES = 512
+# Bodies are compressed once when cached, so spend a little more on ratio than a proxy would
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+# Clients revalidate every time (the data can change on deploy); a 304 costs no body
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+def json_bytes(value) -> bytes:
+    """UTF-8 JSON as JSONResponse renders it (compact, non-ASCII kept), with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def accepted_encodings(accept_encoding: Optional[str]):
+    """Content codings an Accept-Encoding header allows (q > 0), lowercased."""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    return accepted
+
+class EncodedBody:
+    """A JSON body serialized once, with its compressed variants and their strong ETags."""
+
+    def __init__(self, body: bytes, version: str = "", media_type: str = "application/json"):
+        self.media_type = media_type
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        tag = f"{version}-{digest}" if version else digest
+        # Each coding is its own representation, so each gets its own strong validator
+        self.variants: Dict[str, tuple] = {"identity": (body, f'"{tag}"')}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants["gzip"] = (gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), f'"{tag}-gzip"')
+            if brotli is not None:
+                self.variants["br"] = (brotli.compress(body, quality=BROTLI_QUALITY), f'"{tag}-br"')
+        self.size = sum(len(variant) for variant, _ in self.variants.values())
+
+    def response(self, request) -> Response:
+        """The smallest variant the client accepts, or 304 if it already holds this body."""
+        if_none_match = request.headers.get("If-None-Match")
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding"))
+        coding = next((c for c in ("br", "gzip") if c in self.variants and c in accepted), "identity")
+        body, etag = self.variants[coding]
+        headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        # The client may have cached another coding of the same body
+        if if_none_match and any(etag_matches(if_none_match, tag) for _, tag in self.variants.values()):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(body, headers=headers, media_type=self.media_type)
+
+class ResponseCache:
+    """LRU of encoded response bodies for read-only endpoints, keyed by route and normalized query.
+
+    Bodies are built, serialized and compressed on the first request for a key and
+    served as stored bytes afterwards; see EncodedBody.response() for conditional
+    requests and content negotiation.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, EncodedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes], version: str = "") -> EncodedBody:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+            self.stats["misses"] += 1
+        # Building outside the lock; two concurrent misses both build, and the later one is kept
+        entry = EncodedBody(build(), version)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        logger.debug("Cached response %s (%d bytes in %d codings)", key, entry.size, len(entry.variants))
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,458 @@
+import copy
+import heapq
+import json
+import logging
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from core.config import settings
+from data.vocab import VOCAB_INDEX, DifficultyLevel, VocabWord, WordCategory
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+# A failed word comes back within the same session after this long
+RELEARN_DELAY_SECONDS = 60
+
+# Selection weights: words due for review dominate, unseen words fill in, and words that
+# aren't due yet still come up occasionally so small decks never run dry
+DUE_WEIGHT = 4.0
+NEW_WORD_WEIGHT = 1.0
+NOT_DUE_WEIGHT = 0.05
+
+class SessionNotFound(Exception):
+    """Raised for an unknown learner session id."""
+
+class FenwickTree:
+    """Prefix sums over non-negative weights: O(log n) updates and weighted sampling."""
+
+    def __init__(self, weights: List[float]):
+        self.size = len(weights)
+        self._weights = list(weights)
+        self._tree = [0.0] * (self.size + 1)
+        # O(n) build: push each node's sum up to its parent
+        for i, weight in enumerate(weights, 1):
+            self._tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[i]
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def weight(self, index: int) -> float:
+        return self._weights[index]
+
+    def set(self, index: int, weight: float):
+        delta = weight - self._weights[index]
+        self._weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def total(self) -> float:
+        total, i = 0.0, self.size
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, target: float) -> int:
+        """Index whose cumulative weight range contains target."""
+        position, step = 0, self._top_bit
+        while step:
+            following = position + step
+            if following <= self.size and self._tree[following] <= target:
+                position = following
+                target -= self._tree[following]
+            step >>= 1
+        return min(position, self.size - 1)
+
+    def sample(self, rng=random) -> Optional[int]:
+        total = self.total()
+        # Allow for float drift from repeated updates when everything is zeroed
+        if total <= 1e-9:
+            return None
+        return self.find(rng.random() * total)
+
+class ReviewState:
+    """SM-2 state of one word for one learner."""
+
+    def __init__(self, easiness=2.5, interval_days=0.0, repetitions=0, lapses=0, due=0.0, last_reviewed=None):
+        self.easiness = easiness
+        self.interval_days = interval_days
+        self.repetitions = repetitions
+        self.lapses = lapses
+        self.due = due
+        self.last_reviewed = last_reviewed
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "easiness": round(self.easiness, 3),
+            "interval_days": self.interval_days,
+            "repetitions": self.repetitions,
+            "lapses": self.lapses,
+            "due": self.due,
+        }
+
+def quality_from_result(is_correct: bool, pronunciation_score: int) -> int:
+    """Map a check_answer verdict onto SM-2's 0-5 recall quality."""
+    if is_correct:
+        return 5 if pronunciation_score >= 95 else 4 if pronunciation_score >= 85 else 3
+    return 2 if pronunciation_score >= 50 else 1 if pronunciation_score > 0 else 0
+
+def sm2_review(state: ReviewState, quality: int, now: float) -> ReviewState:
+    """Apply one review to a word's state (SuperMemo-2)."""
+    if quality >= 3:
+        if state.repetitions == 0:
+            state.interval_days = 1.0
+        elif state.repetitions == 1:
+            state.interval_days = 6.0
+        else:
+            state.interval_days = round(state.interval_days * state.easiness, 1)
+        state.repetitions += 1
+        state.due = now + state.interval_days * DAY_SECONDS
+    else:
+        state.repetitions = 0
+        state.interval_days = 0.0
+        state.lapses += 1
+        state.due = now + RELEARN_DELAY_SECONDS
+    state.easiness = max(1.3, state.easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    state.last_reviewed = now
+    return state
+
+class SRSStore:
+    """SQLite persistence for sessions, review states and recently shown words. The connection opens on first use.
+
+    Every change to a learner's state happens inside learner(), which also bumps the
+    learner's stored version, so a process can tell whether its copy is current.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        # Reentrant: the store's own methods are called inside a learner() transaction
+        self._lock = threading.RLock()
+
+    def _connection(self):
+        # A connection must not cross a fork; reopen in each worker process
+        if self._conn is None or self._pid != os.getpid():
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    learner_id TEXT NOT NULL,
+                    category TEXT,
+                    difficulty TEXT,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS reviews (
+                    learner_id TEXT NOT NULL,
+                    word TEXT NOT NULL,
+                    easiness REAL NOT NULL,
+                    interval_days REAL NOT NULL,
+                    repetitions INTEGER NOT NULL,
+                    lapses INTEGER NOT NULL,
+                    due REAL NOT NULL,
+                    last_reviewed REAL,
+                    PRIMARY KEY (learner_id, word)
+                );
+                CREATE TABLE IF NOT EXISTS learners (
+                    learner_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS session_recent (
+                    session_id TEXT PRIMARY KEY,
+                    words TEXT NOT NULL
+                );
+            """)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def create_session(self, session_id, learner_id, category, difficulty, created_at):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO sessions (session_id, learner_id, category, difficulty, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, learner_id, category, difficulty, created_at),
+                )
+
+    def load_session(self, session_id):
+        """(learner_id, category, difficulty) or None."""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT learner_id, category, difficulty FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+
+    def load_reviews(self, learner_id) -> Dict[str, ReviewState]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT word, easiness, interval_days, repetitions, lapses, due, last_reviewed FROM reviews WHERE learner_id = ?",
+                (learner_id,),
+            ).fetchall()
+        return {row[0]: ReviewState(*row[1:]) for row in rows}
+
+    def load_recent(self, session_id) -> List[str]:
+        """Words the session showed most recently, oldest first."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT words FROM session_recent WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    @contextmanager
+    def learner(self, learner_id):
+        """A write transaction on one learner's state, yielding the version it starts from.
+
+        Processes serving the same learner take turns here, so each one builds on what
+        the others stored. save_review() and save_recent() belong inside it; the version
+        goes up by one when the block completes.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT version FROM learners WHERE learner_id = ?", (learner_id,)).fetchone()
+                version = row[0] if row else 0
+                yield version
+                conn.execute("INSERT OR REPLACE INTO learners VALUES (?, ?)", (learner_id, version + 1))
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def save_review(self, learner_id, word, state: ReviewState):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (learner_id, word, state.easiness, state.interval_days, state.repetitions,
+                 state.lapses, state.due, state.last_reviewed),
+            )
+
+    def save_recent(self, session_id, words: List[str]):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO session_recent VALUES (?, ?)", (session_id, json.dumps(words, ensure_ascii=False))
+            )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+class LearnerSession:
+    """A learner's pass over one filtered slice of the vocabulary.
+
+    Each word's selection weight lives in a Fenwick tree, so picking the next word and
+    updating a word after a review are both O(log n). Words that are not due yet sit in
+    a heap keyed by due time and get their weight raised once that time has passed.
+    """
+
+    def __init__(self, session_id, learner_id, category, difficulty, states: Dict[str, ReviewState], now: float):
+        self.session_id = session_id
+        self.learner_id = learner_id
+        self.category = category
+        self.difficulty = difficulty
+        self.words: List[VocabWord] = VOCAB_INDEX.words_for(category, difficulty)
+        self.positions = {word.hebrew: index for index, word in enumerate(self.words)}
+        self.states = states
+        self.recent = deque()
+        # Stored learner version this copy reflects; None until it has been checked against the store
+        self.version = None
+        self._lock = threading.Lock()
+        self._rebuild(now)
+
+    def _rebuild(self, now):
+        self._pending = []  # (due, index) of words not yet due
+        self.tree = FenwickTree([self._weight(index, now) for index in range(len(self.words))])
+        for index in self.recent:
+            self.tree.set(index, 0.0)
+
+    def reload(self, states: Dict[str, ReviewState], recent_words: List[str], now: float):
+        """Replace review states and the recent window with the stored ones."""
+        with self._lock:
+            self.states = states
+            self.recent = deque(self.positions[word] for word in recent_words if word in self.positions)
+            self._rebuild(now)
+
+    def recent_words(self) -> List[str]:
+        with self._lock:
+            return [self.words[index].hebrew for index in self.recent]
+
+    def _weight(self, index, now):
+        state = self.states.get(self.words[index].hebrew)
+        if state is None:
+            return NEW_WORD_WEIGHT
+        if state.due <= now:
+            # Harder words (lower easiness) come back a little more often
+            return DUE_WEIGHT * 2.5 / state.easiness
+        heapq.heappush(self._pending, (state.due, index))
+        return NOT_DUE_WEIGHT
+
+    def _promote_due(self, now):
+        while self._pending and self._pending[0][0] <= now:
+            due, index = heapq.heappop(self._pending)
+            state = self.states.get(self.words[index].hebrew)
+            # Skip stale entries (reviewed again since) and words held out as recent
+            if state is not None and state.due == due and index not in self.recent:
+                self.tree.set(index, self._weight(index, now))
+
+    def _hold(self, index, now):
+        """Keep a shown word out of rotation until it falls out of the recent window."""
+        self.tree.set(index, 0.0)
+        self.recent.append(index)
+        while len(self.recent) > settings.SRS_RECENT_WINDOW:
+            self._release(now)
+
+    def _release(self, now):
+        released = self.recent.popleft()
+        self.tree.set(released, self._weight(released, now))
+
+    def next_words(self, count: int, now: float) -> List[VocabWord]:
+        """Pick up to count distinct words by spaced-repetition weight."""
+        with self._lock:
+            self._promote_due(now)
+            chosen = []
+            while len(chosen) < min(count, len(self.words)):
+                index = self.tree.sample()
+                if index is None:
+                    if not self.recent:
+                        break
+                    # Deck smaller than the recent window: let the oldest shown word back in
+                    self._release(now)
+                    continue
+                self.tree.set(index, 0.0)
+                chosen.append(index)
+            for index in chosen:
+                self._hold(index, now)
+            return [self.words[index] for index in chosen]
+
+    def record(self, word: VocabWord, state: ReviewState, now: float) -> ReviewState:
+        """Reschedule a word from its new review state."""
+        with self._lock:
+            self.states[word.hebrew] = state
+            index = self.positions.get(word.hebrew)
+            # A word still in the recent window gets its new weight when it is released
+            if index is not None and index not in self.recent:
+                self.tree.set(index, self._weight(index, now))
+            return state
+
+    def snapshot(self, now: float) -> Dict[str, object]:
+        with self._lock:
+            states = [self.states.get(word.hebrew) for word in self.words]
+        return {
+            "session_id": self.session_id,
+            "learner_id": self.learner_id,
+            "category": self.category.value if self.category else None,
+            "difficulty": self.difficulty.value if self.difficulty else None,
+            "total_words": len(self.words),
+            "new": sum(state is None for state in states),
+            "due": sum(state is not None and state.due <= now for state in states),
+            "learned": sum(state is not None and state.repetitions > 0 for state in states),
+        }
+
+class Scheduler:
+    """Learner sessions backed by SRSStore, with the most recently used ones kept in memory."""
+
+    def __init__(self, store: SRSStore, max_active_sessions: int):
+        self.store = store
+        self.max_active_sessions = max_active_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, session: LearnerSession):
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            while len(self._sessions) > self.max_active_sessions:
+                self._sessions.popitem(last=False)
+
+    def create_session(
+        self,
+        category: Optional[WordCategory] = None,
+        difficulty: Optional[DifficultyLevel] = None,
+        learner_id: Optional[str] = None,
+    ) -> LearnerSession:
+        now = time.time()
+        session_id = secrets.token_urlsafe(16)
+        # Without a learner id the session is its own learner, so history lasts for the session
+        learner_id = learner_id or session_id
+        self.store.create_session(
+            session_id, learner_id,
+            category.value if category else None, difficulty.value if difficulty else None, now,
+        )
+        session = LearnerSession(session_id, learner_id, category, difficulty, self.store.load_reviews(learner_id), now)
+        self._remember(session)
+        return session
+
+    def get_session(self, session_id: str) -> LearnerSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+        row = self.store.load_session(session_id)
+        if row is None:
+            raise SessionNotFound(session_id)
+        learner_id, category, difficulty = row
+        session = LearnerSession(
+            session_id, learner_id,
+            WordCategory(category) if category else None,
+            DifficultyLevel(difficulty) if difficulty else None,
+            self.store.load_reviews(learner_id), time.time(),
+        )
+        self._remember(session)
+        return session
+
+    @contextmanager
+    def _learner_state(self, session: LearnerSession, now: float):
+        """Hold the learner's write transaction, with the session caught up to the stored state.
+
+        Each worker process keeps its own copy of a session; whenever another one has
+        changed the learner's reviews or the session's recent words since, the copy is
+        reloaded before it is used.
+        """
+        try:
+            with self.store.learner(session.learner_id) as version:
+                if session.version != version:
+                    session.reload(
+                        self.store.load_reviews(session.learner_id), self.store.load_recent(session.session_id), now
+                    )
+                session.version = version + 1
+                yield
+        except BaseException:
+            # The copy may be ahead of what was stored
+            session.version = None
+            raise
+
+    def next_words(self, session_id: str, count: int = 1) -> List[VocabWord]:
+        session = self.get_session(session_id)
+        now = time.time()
+        with self._learner_state(session, now):
+            words = session.next_words(count, now)
+            self.store.save_recent(session.session_id, session.recent_words())
+        return words
+
+    def record_result(self, session_id: str, word: VocabWord, is_correct: bool, pronunciation_score: int) -> ReviewState:
+        session = self.get_session(session_id)
+        quality, now = quality_from_result(is_correct, pronunciation_score), time.time()
+        with self._learner_state(session, now):
+            state = sm2_review(copy.copy(session.states.get(word.hebrew)) or ReviewState(), quality, now)
+            self.store.save_review(session.learner_id, word.hebrew, state)
+            session.record(word, state, now)
+        return state
+
+scheduler = Scheduler(SRSStore(settings.SRS_DB_PATH), settings.SRS_MAX_ACTIVE_SESSIONS)
@@ -0,0 +1,70 @@
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+from core.config import settings
+
+@lru_cache(maxsize=4096)
+def _pattern_masks(pattern: str):
+    """Per-character match bitmasks for Myers' algorithm, cached per accepted answer."""
+    masks = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+def edit_distance(pattern: str, text: str) -> int:
+    """Levenshtein distance via Myers/Hyyrö bit-parallelism: one pass over `text`, O(len(text)) word ops.
+
+    Python ints are arbitrary precision, so patterns of any length work; pass the
+    string that repeats across calls (the accepted answer) as `pattern`.
+    """
+    m = len(pattern)
+    if m == 0:
+        return len(text)
+    masks = _pattern_masks(pattern)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    positive, negative = full, 0
+    score = m
+    for char in text:
+        eq = masks.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_positive = negative | (~(xh | positive) & full)
+        horizontal_negative = positive & xh
+        if horizontal_positive & high:
+            score += 1
+        elif horizontal_negative & high:
+            score -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(xv | horizontal_positive) & full)
+        negative = horizontal_positive & xv
+    return score
+
+def similarity(answer: str, response: str) -> float:
+    """1 - normalized edit distance, in [0, 1]."""
+    longest = max(len(answer), len(response))
+    if longest == 0:
+        return 1.0
+    return 1.0 - edit_distance(answer, response) / longest
+
+def best_match(response: str, variants: Iterable[str]) -> Tuple[Optional[str], float]:
+    """Closest accepted variant to a normalized response and its similarity.
+
+    Edit distance is at least the length difference, so variants whose length alone
+    rules out beating the current best are skipped without computing anything.
+    """
+    best_variant, best_score = None, -1.0
+    for variant in variants:
+        longest = max(len(variant), len(response))
+        if longest and 1.0 - abs(len(variant) - len(response)) / longest <= best_score:
+            continue
+        score = similarity(variant, response)
+        if score > best_score:
+            best_variant, best_score = variant, score
+            if score == 1.0:
+                break
+    return best_variant, max(best_score, 0.0)
+
+def is_accepted(score: float) -> bool:
+    return score > settings.ANSWER_MATCH_THRESHOLD
@@ -26,8 +26,13 @@ async def shutdown():
     shutdown_event.set()
     logger.info("Shutdown complete.")
 
-def setup_signal_handlers():
-    """Setup signal handlers for graceful shutdown."""
+def setup_signal_handlers(loop=None):
+    """Setup signal handlers for graceful shutdown.
+
+    Call from inside the serving event loop (e.g. a startup event), not at import or
+    app creation: under a pre-fork process manager the app is built in the master
+    before any loop exists, and the manager owns the signals.
+    """
     if sys.platform == "win32":
         def windows_signal_handler():
             logger.info("CTRL+C detected. Shutting down...")
@@ -44,7 +49,10 @@ def setup_signal_handlers():
 
         thread = threading.Thread(target=wait_for_ctrl_c, daemon=True)
         thread.start()
+    elif threading.current_thread() is not threading.main_thread():
+        # Only the main thread may install handlers (e.g. a test client runs the app in a worker thread)
+        logger.debug("Not in the main thread; leaving signal handling to the host")
     else:
-        loop = asyncio.get_running_loop()
+        loop = loop or asyncio.get_running_loop()
         for sig in (signal.SIGTERM, signal.SIGINT):
             loop.add_signal_handler(sig, lambda: asyncio.create_task(shutdown()))
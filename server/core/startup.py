@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import gc
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Offsets are relative to this module's import, which main.py does before anything heavy
+_origin = time.perf_counter()
+_phases = []  # (name, depth, start offset, seconds)
+_depth = threading.local()
+_lock = threading.Lock()
+
+@contextmanager
+def startup_phase(name: str):
+    """Time one phase of process startup; nested phases are reported under their parent."""
+    depth = getattr(_depth, "value", 0)
+    _depth.value = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _depth.value = depth
+        with _lock:
+            _phases.append((name, depth, started - _origin, time.perf_counter() - started))
+
+def startup_report():
+    """Recorded phases in start order, as plain dicts."""
+    with _lock:
+        phases = sorted(_phases, key=lambda phase: (phase[2], phase[1]))
+    return [
+        {"phase": name, "depth": depth, "start_ms": round(start * 1000, 1), "duration_ms": round(seconds * 1000, 1)}
+        for name, depth, start, seconds in phases
+    ]
+
+# Imported lazily by the request path; import-only, so also safe to load before a fork
+WARM_UP_IMPORTS = ("numpy", "soundfile", "gtts")
+
+def preload_for_workers():
+    """Prepare a pre-fork master, after the app is imported, for forking its workers.
+
+    Vocabulary, indexes and the app are already built by the import; this also loads
+    the lazily imported libraries, the pre-rendered TTS audio and the vocabulary's
+    version hash, then freezes everything allocated so far out of the garbage collector
+    so its passes don't write to those pages and the workers keep sharing them
+    copy-on-write. Nothing here may
+    start threads, which would not survive the fork.
+    """
+    from core.config import settings
+    from core.tts_cache import tts_cache
+    from data.vocab import VOCAB_INDEX
+
+    for name in WARM_UP_IMPORTS:
+        with startup_phase(f"preload: {name}"):
+            importlib.import_module(name)
+    with startup_phase("preload: tts manifest"):
+        tts_cache.load_manifest(settings.TTS_MANIFEST_PATH)
+    with startup_phase("preload: vocabulary version"):
+        VOCAB_INDEX.version
+    gc.collect()
+    gc.freeze()
+
+def _warm_up_steps():
+    from core.audio import _tts_engine
+    from core.transcode import sniff_audio_format
+    from core.transcription import get_backend
+    from data.vocab import VOCAB_INDEX
+
+    return [
+        *((name, functools.partial(importlib.import_module, name)) for name in WARM_UP_IMPORTS),
+        ("tts_engine", _tts_engine),
+        ("libmagic", lambda: sniff_audio_format(b"RIFF\0\0\0\0WAVEfmt ")),
+        ("transcription_backend", lambda: get_backend().warm_up()),
+        ("vocabulary_version", lambda: VOCAB_INDEX.version),
+    ]
+
+async def warm_up():
+    """Load the lazily imported audio and speech dependencies off the event loop.
+
+    Started once the app is up, so the first requests don't pay for these imports while
+    the process is already accepting traffic. A failing step is logged and skipped; the
+    request that needs it will raise the real error.
+    """
+    for name, step in _warm_up_steps():
+        try:
+            with startup_phase(f"warm_up: {name}"):
+                await asyncio.to_thread(step)
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+    logger.debug("Warm-up finished")
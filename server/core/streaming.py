@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from core.vad import EndOfSpeechDetector
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STREAM_SAMPLE_RATE = 16000
+
+class StreamingDecoder:
+    """Decode audio chunks to 16 kHz mono PCM while they are still arriving.
+
+    Chunks are written to a long-lived ffmpeg process as they come in and decoded PCM
+    is read back concurrently and run through an EndOfSpeechDetector, so by the time
+    the stream closes the audio is already decoded and the speech boundary is known.
+    """
+
+    def __init__(self, audio_settings=None):
+        self.detector = EndOfSpeechDetector(STREAM_SAMPLE_RATE, audio_settings)
+        self.raw = bytearray()
+        self._pcm = bytearray()
+        self._process = None
+        self._reader = None
+        self.end_of_speech = asyncio.Event()
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(STREAM_SAMPLE_RATE),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._reader = asyncio.create_task(self._read_pcm())
+
+    async def _read_pcm(self):
+        import numpy as np
+
+        carry = b""
+        while True:
+            chunk = await self._process.stdout.read(8192)
+            if not chunk:
+                break
+            chunk = carry + chunk
+            usable = len(chunk) - len(chunk) % 2
+            carry = chunk[usable:]
+            self._pcm.extend(chunk[:usable])
+            if self.detector.feed(np.frombuffer(chunk[:usable], dtype=np.int16)):
+                self.end_of_speech.set()
+
+    async def feed(self, chunk: bytes):
+        self.raw.extend(chunk)
+        try:
+            self._process.stdin.write(chunk)
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg gave up on this container mid-stream; finish() falls back to the raw bytes
+            pass
+
+    @property
+    def duration_ms(self):
+        return len(self._pcm) // 2 * 1000 // STREAM_SAMPLE_RATE
+
+    def pcm(self) -> "np.ndarray":
+        import numpy as np
+
+        return np.frombuffer(bytes(self._pcm), dtype=np.int16)
+
+    async def finish(self) -> "np.ndarray":
+        """Close the input and return all decoded PCM."""
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        await self._reader
+        _, stderr = await self._process.communicate()
+        if self._process.returncode != 0:
+            logger.debug("Streaming ffmpeg exited with %s: %s", self._process.returncode, stderr[-500:].decode(errors="replace"))
+        return self.pcm()
+
+    async def abort(self):
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        if self._reader:
+            self._reader.cancel()
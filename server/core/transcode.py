@@ -0,0 +1,190 @@
+import io
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from typing import TYPE_CHECKING
+
+from core.config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Normalize MIME subtypes, extensions and magic results to one name per container
+_FORMAT_ALIASES = {
+    "x-wav": "wav", "wave": "wav", "x-pn-wav": "wav",
+    "x-m4a": "m4a", "mp4": "m4a", "aac": "m4a",
+    "mpeg": "mp3", "mpga": "mp3", "x-mpeg": "mp3", "mpeg3": "mp3", "x-mp3": "mp3",
+    "oga": "ogg", "opus": "ogg",
+    "x-flac": "flac",
+    "quicktime": "mov",
+    "x-caf": "caf",
+}
+# Containers libmagic reports under video/ even for audio-only recordings
+_MAGIC_CONTAINER_MIMES = {"video/webm", "video/mp4", "video/quicktime"}
+
+_magic_detector = None
+_magic_lock = threading.Lock()
+
+def _normalize_format(name):
+    if not name:
+        return None
+    name = name.split(";")[0].strip().lower()
+    return _FORMAT_ALIASES.get(name, name) or None
+
+def _detect_mime(file_content):
+    """Sniff a MIME type with a single shared libmagic handle, created on first use."""
+    global _magic_detector
+    with _magic_lock:
+        if _magic_detector is None:
+            import magic  # Ensure python-magic or python-magic-bin is installed
+            _magic_detector = magic.Magic(mime=True)
+        return _magic_detector.from_buffer(file_content[:4096])
+
+def sniff_mime(file_content):
+    """MIME type python-magic detects from the leading bytes, or None if detection failed."""
+    try:
+        return _detect_mime(file_content)
+    except Exception as e:
+        logger.error(f"Error using magic to detect file type: {e}")
+        return None
+
+def audio_format_from_mime(detected_mime):
+    """Container format for a sniffed MIME type, or None if it isn't an audio container."""
+    if detected_mime and (detected_mime.startswith('audio/') or detected_mime in _MAGIC_CONTAINER_MIMES):
+        return _normalize_format(detected_mime.split('/')[-1])
+    return None
+
+def sniff_audio_format(file_content):
+    """Container format detected from the bytes themselves with python-magic, or None."""
+    return audio_format_from_mime(sniff_mime(file_content))
+
+def determine_audio_format(file_content, filename=None, content_type=None, sniffed_format=None):
+    """
+    Determine the audio format using multiple methods:
+    1. Check content_type
+    2. Try to detect from the file extension
+    3. Use python-magic to detect the file type from its content
+
+    Pass `sniffed_format` when sniff_audio_format() already ran to avoid sniffing twice.
+    """
+    format_from_content_type = None
+    format_from_extension = None
+    format_from_magic = sniffed_format or sniff_audio_format(file_content)
+
+    if content_type:
+        format_from_content_type = _normalize_format(content_type.split('/')[-1])
+
+    if filename:
+        _, ext = os.path.splitext(filename)
+        if ext:
+            format_from_extension = _normalize_format(ext[1:])
+
+    logger.debug(
+        "Format detection: content_type=%s, extension=%s, magic=%s",
+        format_from_content_type, format_from_extension, format_from_magic,
+    )
+    return format_from_magic or format_from_extension or format_from_content_type
+
+def passthrough_filename(sniffed_format):
+    """Filename to upload a recording under untouched, or None if it needs transcoding.
+
+    Only the content-sniffed format is trusted here: clients label every recording
+    'recording.webm' regardless of what the browser actually produced.
+    """
+    if sniffed_format and sniffed_format in settings.TRANSCRIPTION_PASSTHROUGH_FORMATS:
+        return f"audio.{sniffed_format}"
+    return None
+
+PCM_SAMPLE_RATE = 16000
+PCM_OUTPUT_ARGS = ["-f", "s16le", "-ac", "1", "-ar", str(PCM_SAMPLE_RATE)]
+
+class TranscodeError(Exception):
+    """Raised when neither ffmpeg nor soundfile could decode a recording."""
+
+def _stderr_tail(stderr: bytes, limit=300) -> str:
+    """Last lines of ffmpeg's stderr; the full output can run to kilobytes per failure."""
+    return stderr[-limit:].decode(errors="replace").strip()
+
+def _run_ffmpeg(input_args, output_args, stdin_data=None):
+    """Run ffmpeg writing its encoded output to stdout; returns (returncode, stdout, stderr)."""
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *input_args, *output_args, "pipe:1"]
+    process = subprocess.run(cmd, input=stdin_data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return process.returncode, process.stdout, process.stderr
+
+def _ffmpeg_in_memory(data, output_args):
+    """ffmpeg over pipes, spooling to a temp file only for large or unseekable-from-a-pipe inputs."""
+    if len(data) > settings.TRANSCODE_SPOOL_THRESHOLD:
+        return _ffmpeg_from_spooled_file(data, output_args)
+    returncode, output, stderr = _run_ffmpeg(["-i", "pipe:0"], output_args, stdin_data=data)
+    if returncode != 0 or not output:
+        logger.debug("FFmpeg could not decode from a pipe, retrying from a temporary file")
+        returncode, output, stderr = _ffmpeg_from_spooled_file(data, output_args)
+    return returncode, output, stderr
+
+def _ffmpeg_from_spooled_file(data, output_args):
+    # Some containers (MP4/MOV with a trailing moov atom, as iOS records) need a seekable input
+    fd, path = tempfile.mkstemp(suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return _run_ffmpeg(["-i", path], output_args)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError as e:
+            logger.error(f"Error deleting temporary file {path}: {e}")
+
+# soundfile encodings for PCM that is already decoded, keyed like TRANSCODE_CODEC
+PCM_ENCODINGS = {
+    "opus": ("OGG", "OPUS", "audio.ogg"),
+    "mp3": ("MP3", "MPEG_LAYER_III", "audio.mp3"),
+    "flac": ("FLAC", "PCM_16", "audio.flac"),
+}
+
+if settings.TRANSCODE_CODEC not in PCM_ENCODINGS:
+    raise ValueError(f"Unknown TRANSCODE_CODEC: {settings.TRANSCODE_CODEC} (expected one of {', '.join(PCM_ENCODINGS)})")
+
+def encode_pcm(samples: "np.ndarray", codec=None):
+    """Encode 16 kHz mono int16 PCM in memory for the transcription backend. Blocking."""
+    import soundfile as sf
+
+    container, subtype, filename = PCM_ENCODINGS[codec or settings.TRANSCODE_CODEC]
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, PCM_SAMPLE_RATE, format=container, subtype=subtype)
+    return buffer.getvalue(), filename
+
+def decode_pcm(data: bytes, max_duration_ms=None) -> "np.ndarray":
+    """Decode a recording to 16 kHz mono int16 PCM in memory. Blocking.
+
+    Decoding stops after max_duration_ms if given, so an overlong clip costs no more
+    than that; compare the result's length with the limit to detect one.
+    Falls back to soundfile (WAV/FLAC/Ogg, resampled with numpy) if ffmpeg can't decode it.
+    """
+    import numpy as np
+    import soundfile as sf
+
+    output_args = PCM_OUTPUT_ARGS if max_duration_ms is None else ["-t", f"{max_duration_ms / 1000:.3f}", *PCM_OUTPUT_ARGS]
+    try:
+        returncode, output, stderr = _ffmpeg_in_memory(data, output_args)
+    except FileNotFoundError:
+        returncode, output, stderr = -1, b"", b"ffmpeg not found"
+    if returncode == 0 and output:
+        return np.frombuffer(output[:len(output) - len(output) % 2], dtype=np.int16)
+
+    try:
+        with sf.SoundFile(io.BytesIO(data)) as source:
+            sample_rate = source.samplerate
+            frames = -1 if max_duration_ms is None else int(sample_rate * max_duration_ms / 1000)
+            samples = source.read(frames, dtype="int16", always_2d=True)
+    except Exception as e:
+        raise TranscodeError(f"Could not decode audio: {_stderr_tail(stderr, 200)} / {e}")
+    mono = samples.mean(axis=1)
+    if sample_rate != PCM_SAMPLE_RATE and len(mono):
+        target_length = int(len(mono) * PCM_SAMPLE_RATE / sample_rate)
+        positions = np.linspace(0, len(mono) - 1, target_length)
+        mono = np.interp(positions, np.arange(len(mono)), mono)
+    return mono.astype(np.int16)
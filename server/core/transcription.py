@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionError(Exception):
+    """Raised when a backend could not produce a transcription."""
+
+class TranscriptionBackend:
+    """Speech-to-text interface. Implementations must be safe to call concurrently."""
+
+    name = "base"
+
+    async def transcribe(self, audio: bytes, language: str, filename: str, timeout: Optional[float] = None) -> str:
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Load whatever the first call would otherwise wait for. Blocking; run off the event loop."""
+
+    async def aclose(self):
+        pass
+
+class OpenAIHTTPBackend(TranscriptionBackend):
+    """Whisper over a pooled keep-alive HTTP client, with per-call timeouts and retries.
+
+    Works against any OpenAI-compatible /audio/transcriptions endpoint, so TRANSCRIPTION_API_BASE
+    can point at a local stand-in server for load tests.
+    """
+
+    name = "openai"
+    RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(self, api_key, api_base, model="whisper-1", timeout=15.0, max_retries=2, max_connections=16):
+        self.api_key = api_key
+        self.api_base = api_base.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._client = None
+        self._client_loop = None
+
+    def warm_up(self):
+        import httpx  # noqa: F401
+
+    def _get_client(self):
+        import httpx
+
+        # The connection pool belongs to one event loop; build it lazily in the loop that uses it
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def transcribe(self, audio, language, filename, timeout=None):
+        import httpx
+
+        client = self._get_client()
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.post(
+                    "/audio/transcriptions",
+                    data={"model": self.model, "language": language, "response_format": "json"},
+                    files={"file": (filename, audio, "application/octet-stream")},
+                    timeout=timeout or self.timeout,
+                )
+                if response.status_code in self.RETRY_STATUSES:
+                    last_error = TranscriptionError(f"Transcription API returned {response.status_code}")
+                else:
+                    response.raise_for_status()
+                    return response.json()["text"].strip()
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                last_error = TranscriptionError(f"Transcription request failed: {e}")
+            except httpx.HTTPStatusError as e:
+                raise TranscriptionError(f"Transcription API returned {e.response.status_code}: {e.response.text[:200]}")
+            if attempt < self.max_retries:
+                # Exponential backoff with jitter: ~0.25s, ~0.5s, ...
+                await asyncio.sleep(0.25 * (2 ** attempt) * (0.5 + random.random()))
+        raise last_error
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class FakeTranscriptionBackend(TranscriptionBackend):
+    """Offline stand-in that answers with fixed text after a configurable latency."""
+
+    name = "fake"
+
+    def __init__(self, text="", latency_ms=0, jitter_ms=0):
+        self.text = text
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    async def transcribe(self, audio, language, filename, timeout=None):
+        delay = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TranscriptionError("Fake transcription timed out")
+        await asyncio.sleep(delay)
+        return self.text
+
+class LocalModelBackend(TranscriptionBackend):
+    """On-box Whisper via faster-whisper, if it is installed. The model loads on first use."""
+
+    name = "local"
+
+    def __init__(self, model_size="base", device="auto"):
+        self.model_size = model_size
+        self.device = device
+        self._model = None
+        # Inference is CPU-bound and the model isn't safe to share across threads
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-whisper")
+
+    def _load_model(self):
+        if self._model is None:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError:
+                raise TranscriptionError("TRANSCRIPTION_BACKEND=local requires the faster-whisper package")
+            self._model = WhisperModel(self.model_size, device=self.device)
+        return self._model
+
+    def warm_up(self):
+        # Loaded on the inference thread, so a request arriving meanwhile queues behind it instead of loading twice
+        self._executor.submit(self._load_model).result()
+
+    def _transcribe_blocking(self, audio, language):
+        import io
+
+        segments, _ = self._load_model().transcribe(io.BytesIO(audio), language=language)
+        return " ".join(segment.text for segment in segments).strip()
+
+    async def transcribe(self, audio, language, filename, timeout=None):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._transcribe_blocking, audio, language)
+        return await asyncio.wait_for(future, timeout) if timeout else await future
+
+    async def aclose(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def create_backend(name: str) -> TranscriptionBackend:
+    if name == "openai":
+        return OpenAIHTTPBackend(
+            api_key=settings.OPENAI_API_KEY,
+            api_base=settings.TRANSCRIPTION_API_BASE,
+            timeout=settings.TRANSCRIPTION_TIMEOUT,
+            max_retries=settings.TRANSCRIPTION_MAX_RETRIES,
+            max_connections=settings.TRANSCRIBE_POOL_WORKERS,
+        )
+    if name == "fake":
+        return FakeTranscriptionBackend(
+            text=settings.FAKE_TRANSCRIPTION_TEXT,
+            latency_ms=settings.FAKE_TRANSCRIPTION_LATENCY_MS,
+            jitter_ms=settings.FAKE_TRANSCRIPTION_JITTER_MS,
+        )
+    if name == "local":
+        return LocalModelBackend(model_size=settings.LOCAL_WHISPER_MODEL)
+    raise ValueError(f"Unknown transcription backend: {name}")
+
+_backend = None
+
+def get_backend() -> TranscriptionBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend(settings.TRANSCRIPTION_BACKEND)
+        logger.info(f"Using '{_backend.name}' transcription backend")
+    return _backend
+
+def set_backend(backend: Optional[TranscriptionBackend]):
+    """Swap the active backend, e.g. for benchmarks. None resets to the configured one."""
+    global _backend
+    _backend = backend
+
+async def close_backend():
+    if _backend is not None:
+        await _backend.aclose()
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from core.config import settings
+
+def audio_fingerprint(pcm_bytes: bytes, language: str) -> str:
+    """Cache key for a clip: hash of its decoded 16 kHz mono PCM plus the transcription language."""
+    return f"pcm:{language}:{hashlib.sha256(pcm_bytes).hexdigest()}"
+
+def upload_fingerprint(content: bytes, language: str) -> str:
+    """Cheaper key on the raw upload, which is byte-identical when a client retries."""
+    return f"raw:{language}:{hashlib.sha256(content).hexdigest()}"
+
+class _Flight:
+    """A transcription in progress and how many callers are waiting on it."""
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+        # Mark a failure retrieved so one every caller abandoned isn't logged as unhandled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+class TranscriptionCache:
+    """TTL- and size-bounded transcription results with coalescing of identical in-flight requests."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, text)
+        self._in_flight = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return text
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    async def get_or_transcribe(self, key, transcribe, aliases=()):
+        """Return the cached text for key, join an identical in-flight call, or run `transcribe()`.
+
+        The call runs in its own task, so a caller that is cancelled (e.g. a client that
+        disconnects) doesn't fail the others waiting on it; it is only cancelled once
+        every caller has gone. The result is also stored under every alias key.
+        Failures are not cached.
+        """
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        loop = asyncio.get_running_loop()
+        flight = self._in_flight.get(key)
+        if flight is not None and flight.task.get_loop() is loop:
+            with self._lock:
+                self.stats["coalesced"] += 1
+        else:
+            with self._lock:
+                self.stats["misses"] += 1
+            flight = _Flight(loop.create_task(self._transcribe(key, transcribe, aliases)))
+            self._in_flight[key] = flight
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody is left waiting for the result
+                flight.task.cancel()
+
+    async def _transcribe(self, key, transcribe, aliases):
+        try:
+            text = await transcribe()
+            for cache_key in (key, *aliases):
+                self.put(cache_key, text)
+            return text
+        finally:
+            flight = self._in_flight.get(key)
+            if flight is not None and flight.task is asyncio.current_task():
+                del self._in_flight[key]
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "in_flight": len(self._in_flight)}
+
+transcription_cache = TranscriptionCache(
+    ttl_seconds=settings.TRANSCRIPTION_CACHE_TTL,
+    max_entries=settings.TRANSCRIPTION_CACHE_MAX_ENTRIES,
+)
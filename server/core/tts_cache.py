@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, workers may synthesize the same phrase twice
+    fcntl = None
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def tts_cache_key(text, language_code="iw", **voice_params):
+    """Content address for a synthesized phrase: text, language and voice params."""
+    payload = json.dumps(
+        {"text": text, "lang": language_code, "voice": voice_params},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """Two-tier audio cache: a byte-bounded in-process LRU in front of an on-disk store.
+
+    The on-disk store is the one shared tier when several worker processes serve the
+    app: entries are written atomically, and fill_lock lets a worker wait for another
+    that is already synthesizing the same phrase instead of synthesizing it again.
+    """
+
+    def __init__(self, cache_dir: Optional[str], max_memory_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._manifests = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_writes": 0,
+            "disk_errors": 0,
+        }
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def relative_path(self, key):
+        # Fan out into sub-directories so large caches don't end up in one flat directory
+        return os.path.join(key[:2], f"{key}.mp3")
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, self.relative_path(key))
+
+    @contextmanager
+    def fill_lock(self, key):
+        """Exclusive lock, across threads and processes sharing cache_dir, for filling this key.
+
+        Keys are striped over 4096 lock files by their first three hex digits, so the lock
+        directory stays bounded while unrelated phrases rarely wait on each other.
+        """
+        if not self.cache_dir or fcntl is None:
+            yield
+            return
+        lock_dir = os.path.join(self.cache_dir, ".locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, f"{key[:3]}.lock"), "ab") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def contains(self, key):
+        """True if the key is present in either tier, without touching the counters."""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.cache_dir) and os.path.exists(self._path(key))
+
+    def get(self, key) -> Optional[bytes]:
+        audio, tier = self._lookup(key)
+        with self._lock:
+            self.stats[f"{tier}_hits" if tier else "misses"] += 1
+        return audio
+
+    def peek(self, key) -> Optional[bytes]:
+        """Like get(), without counting a hit or miss; for re-checks after a lookup that was counted."""
+        return self._lookup(key)[0]
+
+    def _lookup(self, key):
+        """(audio, "memory" or "disk"), or (None, None); disk hits are promoted to the memory tier."""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                return audio, "memory"
+
+        audio = self._read_disk(key)
+        if audio is None:
+            return None, None
+        with self._lock:
+            self._remember(key, audio)
+        return audio, "disk"
+
+    def put(self, key, audio: bytes):
+        with self._lock:
+            self._remember(key, audio)
+        self._write_disk(key, audio)
+
+    def _remember(self, key, audio):
+        """Insert into the memory tier and evict least-recently-used entries. Caller holds the lock."""
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._entries[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read TTS cache entry {key}: {e}")
+            self.stats["disk_errors"] += 1
+            return None
+
+    def _write_disk(self, key, audio):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(audio)
+                os.replace(tmp_path, path)
+            except BaseException:
+                # Don't leave the partial entry behind in the cache directory
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self.stats["disk_writes"] += 1
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry {key}: {e}")
+            self.stats["disk_errors"] += 1
+
+    def load_manifest(self, path) -> int:
+        """Preload pre-rendered audio listed in a manifest into the memory tier.
+
+        Entries that don't fit the memory budget stay on disk and are served from there.
+        A manifest already loaded into this process (e.g. by a pre-fork master) is skipped.
+        Returns the number of entries loaded into memory.
+        """
+        if path in self._manifests:
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable TTS manifest {path}: {e}")
+            return 0
+
+        loaded = 0
+        budget = self.max_memory_bytes
+        for key, entry in manifest.get("entries", {}).items():
+            if entry.get("bytes", 0) > budget:
+                continue
+            audio = self._read_disk(key)
+            if audio is None:
+                continue
+            with self._lock:
+                self._remember(key, audio)
+            budget -= len(audio)
+            loaded += 1
+        self._manifests.add(path)
+        logger.info(f"Preloaded {loaded} pre-rendered TTS entries from {path}")
+        return loaded
+
+    def snapshot(self):
+        """Counters plus current memory-tier occupancy."""
+        with self._lock:
+            return {
+                **self.stats,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+            }
+
+tts_cache = TTSCache(
+    cache_dir=settings.TTS_CACHE_DIR or None,
+    max_memory_bytes=settings.TTS_CACHE_MAX_MEMORY_BYTES,
+)
@@ -0,0 +1,175 @@
+import logging
+import struct
+from typing import Optional
+
+from starlette.requests import ClientDisconnect
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart before 0.0.13
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from core.config import settings
+from core.transcode import audio_format_from_mime, sniff_mime
+
+logger = logging.getLogger(__name__)
+
+# Part headers, boundaries and small form fields on top of the audio itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# libmagic only looks at the start of a file
+SNIFF_BYTES = 4096
+# Sniffed types that can't be a recording; anything else goes on to the decoder
+REJECTED_MIME_TYPES = ("text/", "image/")
+
+class UploadRejected(Exception):
+    """Raised when an upload is refused before it is fully read or decoded."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class AudioUpload:
+    """An uploaded recording held in memory, with what the client and the bytes say it is."""
+
+    def __init__(self, content: bytes, filename: Optional[str], content_type: Optional[str], sniffed_format: Optional[str]):
+        self.content = content
+        self.filename = filename
+        self.content_type = content_type
+        self.sniffed_format = sniffed_format
+
+def wav_duration_ms(head: bytes) -> Optional[int]:
+    """Duration from a WAV header's byte rate and data chunk size, or None if the header doesn't say."""
+    if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return None
+    position, byte_rate = 12, None
+    while position + 8 <= len(head):
+        chunk_id, size = head[position:position + 4], struct.unpack_from("<I", head, position + 4)[0]
+        if chunk_id == b"fmt " and position + 20 <= len(head):
+            byte_rate = struct.unpack_from("<I", head, position + 16)[0]
+        elif chunk_id == b"data":
+            # Streaming writers leave the size as 0 or 0xFFFFFFFF until the end
+            if not byte_rate or size in (0, 0xFFFFFFFF):
+                return None
+            return size * 1000 // byte_rate
+        position += 8 + size + (size & 1)
+    return None
+
+def _too_long(duration_ms: int, max_duration_ms: int) -> UploadRejected:
+    return UploadRejected(413, f"Recording is {duration_ms} ms long; the limit is {max_duration_ms} ms")
+
+def check_duration(duration_ms: int, max_duration_ms: Optional[int] = None):
+    """Reject a decoded recording longer than the limit."""
+    max_duration_ms = max_duration_ms or settings.UPLOAD_MAX_DURATION_MS
+    if duration_ms > max_duration_ms:
+        raise _too_long(duration_ms, max_duration_ms)
+
+async def read_audio_upload(
+    request, field: str = "file", max_bytes: Optional[int] = None, max_duration_ms: Optional[int] = None
+) -> AudioUpload:
+    """Stream a multipart/form-data body and return the audio file in `field`.
+
+    The body is parsed chunk by chunk as it arrives, keeping only that file in memory,
+    and reading stops with UploadRejected as soon as the upload is known to be
+    unacceptable: a Content-Length or running size over max_bytes (413), a first chunk
+    that sniffs as text or an image (415), or a WAV header declaring more than
+    max_duration_ms of audio (413). A body that isn't valid multipart is refused with
+    400. Other containers are checked for duration when they are decoded, see check_duration().
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    max_duration_ms = max_duration_ms or settings.UPLOAD_MAX_DURATION_MS
+    body_limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadRejected(415, "Expected a multipart/form-data upload")
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > body_limit:
+        raise UploadRejected(413, f"Upload is larger than {max_bytes} bytes")
+
+    buffer = bytearray()
+    part = {"headers": {}, "field": None}
+    found = {}
+    header = {"field": b"", "value": b""}
+
+    def on_part_begin():
+        part["headers"] = {}
+        part["field"] = None
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][header["field"].lower()] = header["value"]
+        header["field"], header["value"] = b"", b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        if name == field and "filename" not in found:
+            part["field"] = field
+            filename = disposition.get(b"filename")
+            found["filename"] = filename.decode("utf-8", "replace") if filename is not None else None
+            part_type = part["headers"].get(b"content-type")
+            found["content_type"] = part_type.decode("latin-1") if part_type else None
+
+    def on_part_data(data, start, end):
+        if part["field"] == field:
+            buffer.extend(data[start:end])
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    received = 0
+    sniffed, audio_format = False, None
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise UploadRejected(413, f"Upload is larger than {max_bytes} bytes")
+            parser.write(chunk)
+            if len(buffer) > max_bytes:
+                raise UploadRejected(413, f"Upload is larger than {max_bytes} bytes")
+            if not sniffed and len(buffer) >= SNIFF_BYTES:
+                sniffed, audio_format = True, _sniff(buffer, max_duration_ms)
+        parser.finalize()
+    except ClientDisconnect:
+        raise UploadRejected(400, "Upload was interrupted")
+    except FormParserError as e:
+        # Bad boundary, truncated part headers and the like; the parser's message stays in the log
+        logger.debug("Malformed multipart upload: %s", e)
+        raise UploadRejected(400, "Malformed multipart upload")
+
+    if "filename" not in found:
+        raise UploadRejected(422, f"Missing audio file field '{field}'")
+    if not buffer:
+        raise UploadRejected(400, "Uploaded audio file is empty")
+    if not sniffed:
+        audio_format = _sniff(buffer, max_duration_ms)
+    return AudioUpload(bytes(buffer), found["filename"], found["content_type"], audio_format)
+
+def _sniff(buffer: bytearray, max_duration_ms: int) -> Optional[str]:
+    """Container format from the first bytes, or None; raises UploadRejected for non-audio or an overlong WAV."""
+    head = bytes(buffer[:SNIFF_BYTES])
+    mime = sniff_mime(head)
+    if mime and mime.startswith(REJECTED_MIME_TYPES):
+        raise UploadRejected(415, f"Upload is {mime}, not audio")
+    audio_format = audio_format_from_mime(mime)
+    if audio_format == "wav":
+        duration_ms = wav_duration_ms(head)
+        if duration_ms is not None and duration_ms > max_duration_ms:
+            raise _too_long(duration_ms, max_duration_ms)
+    logger.debug("Sniffed upload as %s (%s)", audio_format, mime)
+    return audio_format
@@ -0,0 +1,120 @@
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from core.config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+FRAME_MS = 20
+
+# AUDIO_SETTINGS["silence_threshold"] is the client's 0-100 volume scale; map it linearly
+# onto frame RMS levels between these bounds (15 -> -52.5 dBFS)
+SILENCE_FLOOR_DBFS = -60.0
+SILENCE_CEILING_DBFS = -10.0
+
+def threshold_dbfs(silence_threshold=None):
+    """Frame level in dBFS below which audio counts as silence."""
+    if silence_threshold is None:
+        silence_threshold = settings.AUDIO_SETTINGS["silence_threshold"]
+    fraction = min(max(silence_threshold, 0), 100) / 100
+    return SILENCE_FLOOR_DBFS + fraction * (SILENCE_CEILING_DBFS - SILENCE_FLOOR_DBFS)
+
+def frame_levels(samples: "np.ndarray", sample_rate: int) -> "np.ndarray":
+    """RMS level in dBFS of each complete FRAME_MS frame of int16 mono samples."""
+    import numpy as np
+
+    frame_size = sample_rate * FRAME_MS // 1000
+    frame_count = len(samples) // frame_size
+    if frame_count == 0:
+        return np.empty(0, dtype=np.float64)
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size).astype(np.float64)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+    return 20.0 * np.log10(np.maximum(rms, 1e-9))
+
+class EndOfSpeechDetector:
+    """Incremental end-of-speech detection over a stream of int16 mono PCM.
+
+    Speech ends once some speech has been heard, at least min_recording_time has
+    elapsed, and the last silence_duration ms were all below the silence threshold.
+    """
+
+    def __init__(self, sample_rate=16000, audio_settings=None):
+        audio_settings = audio_settings or settings.AUDIO_SETTINGS
+        self.sample_rate = sample_rate
+        self.threshold = threshold_dbfs(audio_settings["silence_threshold"])
+        self.silence_frames_needed = max(1, audio_settings["silence_duration"] // FRAME_MS)
+        self.min_frames = audio_settings["min_recording_time"] // FRAME_MS
+        self.frame_size = sample_rate * FRAME_MS // 1000
+        self._pending = None
+        self.frames_seen = 0
+        self.trailing_silent_frames = 0
+        self.last_speech_frame = None
+        self.ended = False
+
+    def feed(self, samples: "np.ndarray") -> bool:
+        """Consume more samples; returns True once end of speech has been detected."""
+        import numpy as np
+
+        if self._pending is not None and len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        usable = len(samples) - len(samples) % self.frame_size
+        self._pending = samples[usable:]
+        levels = frame_levels(samples[:usable], self.sample_rate)
+        if len(levels):
+            voiced = np.flatnonzero(levels >= self.threshold)
+            if len(voiced):
+                self.last_speech_frame = self.frames_seen + int(voiced[-1])
+                self.trailing_silent_frames = len(levels) - 1 - int(voiced[-1])
+            else:
+                self.trailing_silent_frames += len(levels)
+            self.frames_seen += len(levels)
+
+        if (
+            not self.ended
+            and self.last_speech_frame is not None
+            and self.frames_seen >= self.min_frames
+            and self.trailing_silent_frames >= self.silence_frames_needed
+        ):
+            self.ended = True
+        return self.ended
+
+    @property
+    def last_speech_sample(self):
+        """Sample offset just past the last voiced frame, or None if no speech yet."""
+        if self.last_speech_frame is None:
+            return None
+        return (self.last_speech_frame + 1) * self.frame_size
+
+# Bursts shorter than this are clicks or bumps, not speech
+MIN_SPEECH_MS = 100
+# Kept around the detected speech so soft onsets and word endings aren't clipped
+SPEECH_PADDING_MS = 150
+
+def speech_bounds(samples: "np.ndarray", sample_rate=16000, audio_settings=None) -> Optional[Tuple[int, int]]:
+    """(start, end) sample range of the speech in a clip, or None if nothing was said.
+
+    Voiced frames separated by less than silence_duration are merged into one segment
+    (pauses between words); segments shorter than MIN_SPEECH_MS are discarded, and the
+    result spans the first to the last remaining segment plus SPEECH_PADDING_MS.
+    """
+    import numpy as np
+
+    audio_settings = audio_settings or settings.AUDIO_SETTINGS
+    levels = frame_levels(samples, sample_rate)
+    voiced = np.flatnonzero(levels >= threshold_dbfs(audio_settings["silence_threshold"]))
+    if len(voiced) == 0:
+        return None
+
+    max_gap = max(1, audio_settings["silence_duration"] // FRAME_MS)
+    breaks = np.flatnonzero(np.diff(voiced) > max_gap)
+    starts = voiced[np.concatenate(([0], breaks + 1))]
+    ends = voiced[np.concatenate((breaks, [len(voiced) - 1]))] + 1
+    keep = (ends - starts) * FRAME_MS >= MIN_SPEECH_MS
+    if not keep.any():
+        return None
+
+    frame_size = sample_rate * FRAME_MS // 1000
+    padding = sample_rate * SPEECH_PADDING_MS // 1000
+    start = max(0, int(starts[keep][0]) * frame_size - padding)
+    end = min(len(samples), int(ends[keep][-1]) * frame_size + padding)
+    return start, end
@@ -0,0 +1,56 @@
+# server/data/normalize.py
+"""
+Text normalization shared by vocabulary search and answer matching.
+Translation tables are built once at import so normalizing is a couple of C-level passes.
+"""
+
+import re
+import unicodedata
+
+HEBREW_FINAL_FORMS = {
+    "ך": "כ",
+    "ם": "מ",
+    "ן": "נ",
+    "ף": "פ",
+    "ץ": "צ",
+}
+
+def _build_hebrew_table():
+    table = {}
+    # Cantillation marks and vowel points (niqqud) live in U+0591..U+05C7, before the letters
+    for codepoint in range(0x0591, 0x05C8):
+        table[codepoint] = None
+    table[0x05BE] = " "  # maqaf joins words like a hyphen
+    for final, base in HEBREW_FINAL_FORMS.items():
+        table[ord(final)] = base
+    return table
+
+_HEBREW_TABLE = _build_hebrew_table()
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def strip_niqqud(text: str) -> str:
+    """Remove vowel points and cantillation, keeping the consonantal text."""
+    return unicodedata.normalize("NFKD", text).translate(_HEBREW_TABLE)
+
+def fold_text(text: str) -> str:
+    """Search form of Hebrew or English text: no niqqud, final letters folded, lowercased, single-spaced."""
+    folded = strip_niqqud(text).lower()
+    return _WHITESPACE_RE.sub(" ", folded).strip()
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_PARENTHETICAL_RE = re.compile(r"\([^)]*\)")
+ENGLISH_ARTICLES = frozenset({"a", "an", "the"})
+
+def is_hebrew(text: str) -> bool:
+    return any("֐" <= char <= "׿" for char in text)
+
+def normalize_answer(text: str, language: str) -> str:
+    """Comparison form of a spoken answer: folded, punctuation dropped, and for English no articles or parentheticals."""
+    if language == "en":
+        text = _PARENTHETICAL_RE.sub(" ", text)
+    folded = _NON_WORD_RE.sub("", fold_text(text))
+    tokens = folded.split()
+    if language == "en":
+        # Keep a bare article ("a") rather than normalizing it to nothing
+        tokens = [token for token in tokens if token not in ENGLISH_ARTICLES] or tokens
+    return " ".join(tokens)
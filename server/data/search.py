@@ -0,0 +1,159 @@
+# server/data/search.py
+"""
+Prebuilt n-gram index for vocabulary search.
+
+Hebrew and English forms are folded with data.normalize.fold_text and every 1..3-gram
+of each form gets a posting list of word ids. A query intersects the postings of its
+own n-grams, so only words sharing them are ever looked at, and ranked results are
+cached per query so paging through them costs only the page.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from core.startup import startup_phase
+from data.normalize import fold_text
+from data.vocab import VOCAB_INDEX, VOCABULARY_DATA, DifficultyLevel, VocabWord, WordCategory
+
+MAX_GRAM = 3
+
+# Match quality tiers, best first
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to a different query."""
+
+def _grams(text: str, size: int):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def _match_tier(form: str, query: str) -> Optional[int]:
+    if form == query:
+        return EXACT
+    if form.startswith(query):
+        return PREFIX
+    position = form.find(query)
+    if position < 0:
+        return None
+    if form[position - 1] == " ":
+        return WORD_PREFIX
+    return SUBSTRING
+
+class SearchIndex:
+    def __init__(self, words: List[VocabWord], result_cache_size: int = 256):
+        self.words = words
+        self.forms: List[Tuple[str, str]] = [(fold_text(w.hebrew), fold_text(w.english)) for w in words]
+        self.postings: Dict[str, List[int]] = {}
+        for word_id, forms in enumerate(self.forms):
+            grams = set()
+            for form in forms:
+                for size in range(1, MAX_GRAM + 1):
+                    grams |= _grams(form, size)
+            for gram in grams:
+                # Word ids are appended in order, so every posting list stays sorted
+                self.postings.setdefault(gram, []).append(word_id)
+        self.version = hashlib.sha256(
+            json.dumps(self.forms, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+        self._results = OrderedDict()
+        self._result_cache_size = result_cache_size
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "cache_misses": 0}
+
+    def _candidates(self, query: str) -> List[int]:
+        if len(query) <= MAX_GRAM:
+            return self.postings.get(query, [])
+        grams = sorted(_grams(query, MAX_GRAM), key=lambda g: len(self.postings.get(g, ())))
+        candidates = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(self.postings.get(gram, ()))
+        return sorted(candidates)
+
+    def _ranked(self, query: str, category: Optional[WordCategory], difficulty: Optional[DifficultyLevel]) -> List[int]:
+        key = (query, category, difficulty)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return cached
+            self.stats["cache_misses"] += 1
+
+        scored = []
+        for word_id in self._candidates(query):
+            word = self.words[word_id]
+            if category is not None and word.category != category:
+                continue
+            if difficulty is not None and word.difficulty != difficulty:
+                continue
+            tiers = [
+                (tier, len(form))
+                for form in self.forms[word_id]
+                for tier in (_match_tier(form, query),)
+                if tier is not None
+            ]
+            if tiers:
+                tier, length = min(tiers)
+                scored.append((tier, length, word_id))
+        scored.sort()
+        ranked = [word_id for _, _, word_id in scored]
+
+        with self._lock:
+            self._results[key] = ranked
+            if len(self._results) > self._result_cache_size:
+                self._results.popitem(last=False)
+        return ranked
+
+    def _fingerprint(self, query, category, difficulty) -> str:
+        raw = f"{self.version}|{query}|{category or ''}|{difficulty or ''}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8]
+
+    def encode_cursor(self, offset: int, query: str, category=None, difficulty=None) -> str:
+        payload = json.dumps({"o": offset, "f": self._fingerprint(query, category, difficulty)})
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor: str, query: str, category=None, difficulty=None) -> int:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            offset = int(payload["o"])
+            fingerprint = payload["f"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursor(f"Malformed cursor: {e}")
+        if offset < 0 or fingerprint != self._fingerprint(query, category, difficulty):
+            raise InvalidCursor("Cursor does not belong to this query")
+        return offset
+
+    def search(
+        self,
+        query: str,
+        category: Optional[WordCategory] = None,
+        difficulty: Optional[DifficultyLevel] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[VocabWord], int, Optional[str]]:
+        """One page of ranked matches: (words, total matches, cursor for the next page or None).
+
+        An empty query pages through the filtered vocabulary in its original order.
+        """
+        folded = fold_text(query or "")
+        offset = self.decode_cursor(cursor, folded, category, difficulty) if cursor else 0
+        if folded:
+            ranked = self._ranked(folded, category, difficulty)
+            page = [self.words[word_id] for word_id in ranked[offset:offset + limit]]
+            total = len(ranked)
+        else:
+            matching = VOCAB_INDEX.words_for(category, difficulty)
+            page = matching[offset:offset + limit]
+            total = len(matching)
+        next_offset = offset + len(page)
+        next_cursor = self.encode_cursor(next_offset, folded, category, difficulty) if next_offset < total else None
+        return page, total, next_cursor
+
+with startup_phase("build search index"):
+    SEARCH_INDEX = SearchIndex(VOCABULARY_DATA)
@@ -5,11 +5,24 @@ Enhanced vocabulary system for Stud.ai Hebrew language practice app.
 Vocabulary data is now stored separately in a JSON file.
 """
 
+import hashlib
 import json
+import logging
 import os
 import random
+import re
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Any, Set, Tuple
+
+from core.config import settings
+from core.response_cache import json_bytes
+from core.startup import startup_phase
+from data.normalize import is_hebrew, normalize_answer
+from data.vocab_snapshot import SnapshotError, compile_snapshot, is_current, load_snapshot
+
+logger = logging.getLogger(__name__)
 
 # Define your enums as before
 class WordCategory(str, Enum):
@@ -32,6 +45,12 @@ class DifficultyLevel(str, Enum):
 
 class VocabWord:
     """Represents a vocabulary word with its metadata"""
+    # No per-instance __dict__: memory per word stays small as word packs grow
+    __slots__ = (
+        "hebrew", "english", "category", "difficulty", "tags", "notes",
+        "pronunciation_guide", "example_sentence", "_dict", "_json",
+    )
+
     def __init__(
         self,
         hebrew: str,
@@ -51,18 +70,29 @@ class VocabWord:
         self.notes = notes
         self.pronunciation_guide = pronunciation_guide
         self.example_sentence = example_sentence or {}
+        self._dict = None
+        self._json = None
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "hebrew": self.hebrew,
-            "english": self.english,
-            "category": self.category,
-            "difficulty": self.difficulty,
-            "tags": self.tags,
-            "notes": self.notes,
-            "pronunciation_guide": self.pronunciation_guide,
-            "example_sentence": self.example_sentence
-        }
+        """API representation, built on first use and shared afterwards; treat it as read-only."""
+        if self._dict is None:
+            self._dict = {
+                "hebrew": self.hebrew,
+                "english": self.english,
+                "category": self.category,
+                "difficulty": self.difficulty,
+                "tags": self.tags,
+                "notes": self.notes,
+                "pronunciation_guide": self.pronunciation_guide,
+                "example_sentence": self.example_sentence
+            }
+        return self._dict
+
+    def to_json(self) -> bytes:
+        """to_dict() serialized, built on first use; response bodies are spliced together from these."""
+        if self._json is None:
+            self._json = json_bytes(self.to_dict())
+        return self._json
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'VocabWord':
@@ -80,22 +110,219 @@ class VocabWord:
 # Load vocabulary from JSON file
 VOCABULARY_JSON_PATH = os.path.join(os.path.dirname(__file__), "vocabulary.json")
 
-def load_vocabulary() -> List[VocabWord]:
-    with open(VOCABULARY_JSON_PATH, "r", encoding="utf-8") as f:
+def _load_json(path: str) -> List[VocabWord]:
+    with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
     return [VocabWord.from_dict(entry) for entry in data]
 
-VOCABULARY_DATA = load_vocabulary()
+def _from_snapshot(path: str) -> List[VocabWord]:
+    categories = {category.value: category for category in WordCategory}
+    difficulties = {difficulty.value: difficulty for difficulty in DifficultyLevel}
+    return [
+        VocabWord(hebrew, english, categories[category], difficulties[difficulty], tags, notes, guide, example)
+        for hebrew, english, category, difficulty, tags, notes, guide, example in load_snapshot(path)
+    ]
+
+def load_vocabulary(
+    source_path: str = VOCABULARY_JSON_PATH, snapshot_path: Optional[str] = None
+) -> List[VocabWord]:
+    """Words from the compiled snapshot when it matches the JSON source, else from the JSON.
+
+    A missing, stale or unreadable snapshot is rebuilt from the JSON on the way; if it
+    can't be written (e.g. a read-only deployment) the JSON is used and startup carries on.
+    """
+    snapshot_path = settings.VOCAB_SNAPSHOT_PATH if snapshot_path is None else snapshot_path
+    if not snapshot_path:
+        return _load_json(source_path)
+    if is_current(snapshot_path, source_path):
+        try:
+            return _from_snapshot(snapshot_path)
+        except (OSError, SnapshotError, KeyError, ValueError) as e:
+            if not os.path.exists(source_path):
+                raise
+            logger.warning(f"Rebuilding unreadable vocabulary snapshot {snapshot_path}: {e}")
+    try:
+        compile_snapshot(source_path, snapshot_path)
+        logger.info(f"Compiled vocabulary snapshot {snapshot_path}")
+    except OSError as e:
+        logger.warning(f"Could not write vocabulary snapshot {snapshot_path}, loading JSON: {e}")
+        return _load_json(source_path)
+    return _from_snapshot(snapshot_path)
+
+with startup_phase("load vocabulary"):
+    VOCABULARY_DATA = load_vocabulary()
+
+# Accepted alternate answers: "alt:<answer>" tags, or "Also: a, b" in the notes
+ALT_TAG_PREFIX = "alt:"
+_NOTES_ALSO_RE = re.compile(r"\balso:\s*([^.;]+)", re.IGNORECASE)
+
+def answer_variants(word: VocabWord) -> Dict[str, Tuple[str, ...]]:
+    """Normalized accepted answers for a word, per answer language ("en"/"he")."""
+    raw = {"en": [], "he": [word.hebrew]}
+    for part in word.english.split("/"):
+        raw["en"].append(part)
+        # "to go" -> "go": learners often drop the infinitive marker
+        if word.category == WordCategory.VERB and part.lower().startswith("to "):
+            raw["en"].append(part[3:])
+    alternates = [tag[len(ALT_TAG_PREFIX):] for tag in word.tags if tag.startswith(ALT_TAG_PREFIX)]
+    for match in _NOTES_ALSO_RE.finditer(word.notes or ""):
+        alternates.extend(match.group(1).split(","))
+    for alternate in alternates:
+        raw["he" if is_hebrew(alternate) else "en"].append(alternate)
+
+    variants = {}
+    for language, texts in raw.items():
+        normalized = (normalize_answer(text, language) for text in texts)
+        variants[language] = tuple(dict.fromkeys(text for text in normalized if text))
+    return variants
+
+class VocabIndex:
+    """Lookup structures over the vocabulary, built once at import.
+
+    Words are bucketed by (category, difficulty); every filter combination maps to a
+    list of buckets plus cumulative sizes, so counts are precomputed and sampling picks
+    a position in O(log buckets) without materializing the filtered word list.
+    """
+
+    def __init__(self, words: List[VocabWord]):
+        self.words = words
+        self._version = None
+        self.by_hebrew: Dict[str, VocabWord] = {}
+        self.by_english: Dict[str, VocabWord] = {}
+        self._answer_variants: Dict[int, Dict[str, Tuple[str, ...]]] = {}
+        for word in words:
+            self.by_hebrew.setdefault(word.hebrew, word)
+            self.by_english.setdefault(word.english, word)
+            self._answer_variants[id(word)] = answer_variants(word)
+
+        self.buckets: Dict[Tuple[WordCategory, DifficultyLevel], List[VocabWord]] = {
+            (category, difficulty): [] for category in WordCategory for difficulty in DifficultyLevel
+        }
+        for word in words:
+            self.buckets[(word.category, word.difficulty)].append(word)
+
+        # Every (category or None, difficulty or None) filter -> (buckets, cumulative sizes, matching words)
+        self._selections = {}
+        for category in [None, *WordCategory]:
+            for difficulty in [None, *DifficultyLevel]:
+                selected = [
+                    bucket for (bucket_category, bucket_difficulty), bucket in self.buckets.items()
+                    if bucket and (category is None or bucket_category == category)
+                    and (difficulty is None or bucket_difficulty == difficulty)
+                ]
+                cumulative = list(accumulate(len(bucket) for bucket in selected))
+                self._selections[(category, difficulty)] = (selected, cumulative, None)
+
+        self._stats = {
+            "total_words": len(words),
+            "by_category": {category.value: self.count(category=category) for category in WordCategory},
+            "by_difficulty": {difficulty.value: self.count(difficulty=difficulty) for difficulty in DifficultyLevel},
+            "by_category_and_difficulty": {
+                category.value: {
+                    difficulty.value: len(self.buckets[(category, difficulty)]) for difficulty in DifficultyLevel
+                }
+                for category in WordCategory
+            },
+        }
+
+    @property
+    def version(self) -> str:
+        """Content hash of every word, computed on first use; validators of cached responses include it."""
+        if self._version is None:
+            digest = hashlib.sha256()
+            for word in self.words:
+                digest.update(json_bytes([
+                    word.hebrew, word.english, word.category, word.difficulty, word.tags,
+                    word.notes, word.pronunciation_guide, word.example_sentence,
+                ]))
+            self._version = digest.hexdigest()[:12]
+        return self._version
+
+    def lookup(self, text: str) -> Optional[VocabWord]:
+        """Find a word by its Hebrew or English form."""
+        return self.by_hebrew.get(text) or self.by_english.get(text)
+
+    def variants(self, word: VocabWord, language: str) -> Tuple[str, ...]:
+        """Precomputed normalized answers accepted for a word in the given language."""
+        variants = self._answer_variants.get(id(word))
+        if variants is None:
+            variants = answer_variants(word)
+        return variants[language]
+
+    def count(self, category: Optional[WordCategory] = None, difficulty: Optional[DifficultyLevel] = None) -> int:
+        _, cumulative, _ = self._selections[(category, difficulty)]
+        return cumulative[-1] if cumulative else 0
+
+    def words_for(self, category: Optional[WordCategory] = None, difficulty: Optional[DifficultyLevel] = None) -> List[VocabWord]:
+        """Words matching the filters in vocabulary order; materialized once per filter and reused."""
+        if category is None and difficulty is None:
+            return self.words
+        selected, cumulative, words = self._selections[(category, difficulty)]
+        if words is None:
+            words = [
+                word for word in self.words
+                if (category is None or word.category == category)
+                and (difficulty is None or word.difficulty == difficulty)
+            ]
+            self._selections[(category, difficulty)] = (selected, cumulative, words)
+        return words
+
+    def _word_at(self, selected, cumulative, position) -> VocabWord:
+        bucket_index = bisect_right(cumulative, position)
+        offset = cumulative[bucket_index - 1] if bucket_index else 0
+        return selected[bucket_index][position - offset]
+
+    def sample(
+        self,
+        count: int = 1,
+        category: Optional[WordCategory] = None,
+        difficulty: Optional[DifficultyLevel] = None,
+        exclude: Optional[Set[str]] = None,
+    ) -> List[VocabWord]:
+        """Uniformly sample distinct words matching the filters, skipping excluded Hebrew forms."""
+        selected, cumulative, _ = self._selections[(category, difficulty)]
+        total = cumulative[-1] if cumulative else 0
+        if total == 0 or count <= 0:
+            return []
+        exclude = exclude or set()
+
+        # Rejection sampling is O(count) while exclusions cover a small share of the pool;
+        # otherwise fall back to filtering the (cached) candidate list.
+        if len(exclude) * 2 < total and count * 2 < total:
+            chosen_positions = set()
+            result = []
+            attempts = 0
+            while len(result) < count and attempts < 8 * count + 16:
+                attempts += 1
+                position = random.randrange(total)
+                if position in chosen_positions:
+                    continue
+                chosen_positions.add(position)
+                word = self._word_at(selected, cumulative, position)
+                if word.hebrew not in exclude:
+                    result.append(word)
+            if len(result) == count:
+                return result
+
+        candidates = [word for word in self.words_for(category, difficulty) if word.hebrew not in exclude]
+        return random.sample(candidates, min(count, len(candidates)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Word counts by category, difficulty and both, computed at build time."""
+        return self._stats
+
+with startup_phase("build vocabulary index"):
+    VOCAB_INDEX = VocabIndex(VOCABULARY_DATA)
 
 # Utility functions
 def get_all_words() -> List[VocabWord]:
     return VOCABULARY_DATA
 
 def get_words_by_category(category: WordCategory) -> List[VocabWord]:
-    return [word for word in VOCABULARY_DATA if word.category == category]
+    return VOCAB_INDEX.words_for(category=category)
 
 def get_words_by_difficulty(difficulty: DifficultyLevel) -> List[VocabWord]:
-    return [word for word in VOCABULARY_DATA if word.difficulty == difficulty]
+    return VOCAB_INDEX.words_for(difficulty=difficulty)
 
 def search_words(query: str) -> List[VocabWord]:
     query = query.lower()
@@ -105,18 +332,23 @@ def get_random_words(
     count: int = 1,
     category: Optional[WordCategory] = None,
     difficulty: Optional[DifficultyLevel] = None,
-    exclude_words: Optional[List[str]] = None
+    exclude_words: Optional[Iterable[str]] = None
 ) -> List[VocabWord]:
-    filtered_words = VOCABULARY_DATA
-    if category:
-        filtered_words = [word for word in filtered_words if word.category == category]
-    if difficulty:
-        filtered_words = [word for word in filtered_words if word.difficulty == difficulty]
-    if exclude_words:
-        filtered_words = [word for word in filtered_words if word.hebrew not in exclude_words]
-    if not filtered_words:
-        return []
-    return random.sample(filtered_words, min(count, len(filtered_words)))
+    exclude = exclude_words if isinstance(exclude_words, (set, frozenset)) else set(exclude_words or ())
+    return VOCAB_INDEX.sample(count, category=category, difficulty=difficulty, exclude=exclude)
+
+def prompt_text(text: str) -> str:
+    """Text that next_word sends to TTS when prompting for a word."""
+    return f"{text}?"
+
+def tts_phrases(word: VocabWord) -> List[Tuple[str, str]]:
+    """All (text, language_code) pairs the API synthesizes for a word."""
+    return [
+        (prompt_text(word.hebrew), "iw"),    # next_word, lang=iw
+        (prompt_text(word.english), "en"),   # next_word, lang=en
+        (word.hebrew, "iw"),                 # get_pronunciation, lang=iw
+        (word.english, "en"),                # get_pronunciation, lang=en
+    ]
 
 # For backwards compatibility
 VOCAB = {word.hebrew: word.english for word in VOCABULARY_DATA}
@@ -0,0 +1,203 @@
+# server/data/vocab_snapshot.py
+"""
+Binary snapshot of vocabulary.json for fast startup.
+
+The JSON word list is compiled into one file that is mapped with mmap and read
+without a JSON parse: a header, a table of fixed-size word records, a list of string
+references for tags and example sentences, and a deduplicated, NUL-separated UTF-8
+string table. The table is decoded in one pass and every distinct string (a tag, a
+category, a repeated note) is shared by all words that use it.
+
+The header records the source file's size, mtime and SHA-256. A snapshot whose size
+and mtime match is used as is; otherwise the source is hashed, so a checkout that
+only touched the mtime still reuses it, and a real edit triggers a rebuild.
+
+    python -m data.vocab_snapshot [--source data/vocabulary.json] [--output PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b"SVOC"
+VERSION = 1
+
+# magic, version, byte order (0 little, 1 big), source size, source mtime_ns, source sha256,
+# word count, reference count, string count, string table bytes
+_HEADER = struct.Struct("<4sHHQQ32sIIII")
+# hebrew, english, category, difficulty, notes, pronunciation guide (string ids), then the
+# start and length of the word's tags and of its example sentence's key/value pairs in the
+# reference list
+_RECORD_FIELDS = 10
+_NONE = 0xFFFFFFFF
+
+# (hebrew, english, category, difficulty, tags, notes, pronunciation_guide, example_sentence)
+WordFields = Tuple[str, str, str, str, List[str], Optional[str], Optional[str], Dict[str, str]]
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is truncated, from another version or otherwise unreadable."""
+
+def _byte_order() -> int:
+    return 0 if sys.byteorder == "little" else 1
+
+def _source_signature(source_path: str) -> Tuple[int, int]:
+    stat = os.stat(source_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _sha256(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+def compile_snapshot(source_path: str, snapshot_path: str) -> int:
+    """Compile the JSON word list into a snapshot file (written atomically); returns the word count."""
+    with open(source_path, "rb") as f:
+        raw = f.read()
+    entries = json.loads(raw)
+    size, mtime_ns = _source_signature(source_path)
+
+    strings: Dict[str, int] = {}
+
+    def string_id(value) -> int:
+        if value is None:
+            return _NONE
+        return strings.setdefault(value, len(strings))
+
+    records = array("I")
+    refs = array("I")
+    for entry in entries:
+        tags = entry.get("tags") or []
+        example = entry.get("example_sentence") or {}
+        records.extend([
+            string_id(entry["hebrew"]),
+            string_id(entry["english"]),
+            string_id(entry["category"]),
+            string_id(entry["difficulty"]),
+            string_id(entry.get("notes")),
+            string_id(entry.get("pronunciation_guide")),
+            len(refs),
+            len(tags),
+            len(refs) + len(tags),
+            2 * len(example),
+        ])
+        refs.extend(string_id(tag) for tag in tags)
+        for key, value in example.items():
+            refs.extend((string_id(key), string_id(value)))
+
+    if any("\0" in value for value in strings):
+        raise ValueError(f"{source_path} contains a NUL character, which the snapshot uses as a separator")
+    table = "\0".join(strings).encode("utf-8")
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, _byte_order(), size, mtime_ns, hashlib.sha256(raw).digest(),
+        len(entries), len(refs), len(strings), len(table),
+    )
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # Every section is a whole number of 4-byte items, so the arrays stay aligned for memoryview.cast
+            f.write(header)
+            f.write(records.tobytes())
+            f.write(refs.tobytes())
+            f.write(table)
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(entries)
+
+def read_header(snapshot_path: str) -> Dict[str, Any]:
+    with open(snapshot_path, "rb") as f:
+        data = f.read(_HEADER.size)
+    if len(data) < _HEADER.size:
+        raise SnapshotError(f"{snapshot_path} is truncated")
+    magic, version, byte_order, size, mtime_ns, sha256, words, refs, strings, table_bytes = _HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or byte_order != _byte_order():
+        raise SnapshotError(f"{snapshot_path} is not a version {VERSION} snapshot for this platform")
+    return {
+        "source_size": size, "source_mtime_ns": mtime_ns, "source_sha256": sha256,
+        "words": words, "refs": refs, "strings": strings, "table_bytes": table_bytes,
+    }
+
+def is_current(snapshot_path: str, source_path: str) -> bool:
+    """Whether the snapshot was compiled from the source file as it is now.
+
+    A missing source counts as current, so a deployment may ship the snapshot alone.
+    """
+    try:
+        header = read_header(snapshot_path)
+    except (OSError, SnapshotError):
+        return False
+    try:
+        signature = _source_signature(source_path)
+    except FileNotFoundError:
+        return True
+    if signature == (header["source_size"], header["source_mtime_ns"]):
+        return True
+    return signature[0] == header["source_size"] and _sha256(source_path) == header["source_sha256"]
+
+def load_snapshot(snapshot_path: str) -> List[WordFields]:
+    """Field tuples for every word in the snapshot, in source order."""
+    header = read_header(snapshot_path)
+    word_count, ref_count = header["words"], header["refs"]
+    with open(snapshot_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            records_end = _HEADER.size + word_count * _RECORD_FIELDS * 4
+            refs_end = records_end + ref_count * 4
+            if refs_end + header["table_bytes"] != len(mapped):
+                raise SnapshotError(f"{snapshot_path} is truncated")
+            with memoryview(mapped) as view:
+                with view[_HEADER.size:records_end] as section, section.cast("I") as cast:
+                    records = cast.tolist()
+                with view[records_end:refs_end] as section, section.cast("I") as cast:
+                    refs = cast.tolist()
+                with view[refs_end:] as section:
+                    strings = str(section, "utf-8").split("\0") if header["strings"] else []
+    if len(strings) != header["strings"]:
+        raise SnapshotError(f"{snapshot_path} has a corrupt string table")
+
+    words = []
+    lookup = strings.__getitem__
+    fields = iter(records)
+    try:
+        for hebrew, english, category, difficulty, notes, guide, tag_start, tag_count, pair_start, pair_count in zip(*[fields] * _RECORD_FIELDS):
+            pairs = refs[pair_start:pair_start + pair_count]
+            words.append((
+                strings[hebrew],
+                strings[english],
+                strings[category],
+                strings[difficulty],
+                list(map(lookup, refs[tag_start:tag_start + tag_count])),
+                None if notes == _NONE else strings[notes],
+                None if guide == _NONE else strings[guide],
+                dict(zip(map(lookup, pairs[::2]), map(lookup, pairs[1::2]))),
+            ))
+    except IndexError:
+        raise SnapshotError(f"{snapshot_path} refers to strings it doesn't contain") from None
+    return words
+
+def main():
+    from core.config import settings
+    from data.vocab import VOCABULARY_JSON_PATH
+
+    parser = argparse.ArgumentParser(description="Compile vocabulary.json into a binary snapshot.")
+    parser.add_argument("--source", default=VOCABULARY_JSON_PATH)
+    parser.add_argument("--output", default=settings.VOCAB_SNAPSHOT_PATH or None)
+    args = parser.parse_args()
+    if not args.output:
+        parser.error("no --output given and VOCAB_SNAPSHOT_PATH is empty")
+    count = compile_snapshot(args.source, args.output)
+    print(f"Compiled {count} words from {args.source} into {args.output} ({os.path.getsize(args.output)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
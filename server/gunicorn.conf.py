@@ -0,0 +1,38 @@
+# server/gunicorn.conf.py
+"""
+Multi-process serving: gunicorn forks uvicorn workers from a master that has already
+imported the app (preload_app), so the vocabulary, its indexes, the lazily imported
+audio libraries and pre-rendered TTS audio are loaded once and shared copy-on-write.
+Workers share the TTS cache's on-disk store, so audio one worker synthesizes is served
+from disk by the others.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+WEB_CONCURRENCY sets the worker count (default: one per available core).
+"""
+import os
+
+def _available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Read by core.config when the app is preloaded below, so these must be set first.
+# gunicorn owns SIGTERM/SIGINT (graceful worker restarts), and CPU-bound transcoding
+# gets a share of the cores per worker instead of every worker sizing its pool to all of them.
+workers = int(os.getenv("WEB_CONCURRENCY", str(_available_cores())))
+os.environ.setdefault("HANDLE_SIGNALS", "false")
+os.environ.setdefault("TRANSCODE_POOL_WORKERS", str(max(1, _available_cores() // workers)))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Uploads plus a transcription round trip must finish well inside this
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+def when_ready(server):
+    from core.startup import preload_for_workers
+
+    preload_for_workers()
@@ -1,19 +1,26 @@
 
-import uvicorn
 import logging
-from core.app import create_app
-from core.logging_config import configure_logging
+from core.startup import startup_phase
+
+with startup_phase("import app modules"):
+    from core.app import create_app
+    from core.config import settings
+    from core.logging_config import configure_logging
 
 # Configure Logging
-logger = configure_logging()
+with startup_phase("configure logging"):
+    logger = configure_logging()
 
 # Initialize FastAPI app
-app = create_app()
+with startup_phase("create app"):
+    app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     try:
         logger.info("Starting Uvicorn server on http://0.0.0.0:8000")
-        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="debug")
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level=settings.LOG_LEVEL.lower())
     except KeyboardInterrupt:
         logger.info("Server interrupted. Shutting down...")
     except Exception as e:
@@ -0,0 +1,126 @@
+# server/prerender_tts.py
+"""
+Pre-render prompt and pronunciation audio for the whole vocabulary.
+
+Writes every phrase into the TTS cache's on-disk store and records it in a
+manifest that the server preloads at startup, so cold instances can serve
+prompts without calling gTTS. Re-runs only synthesize phrases whose text
+changed since the last manifest was written.
+
+    python prerender_tts.py [--workers 4] [--prune]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.audio import mp3_duration_ms, synthesize_speech
+from core.config import settings
+from core.tts_cache import tts_cache, tts_cache_key
+from data.vocab import VOCABULARY_DATA, tts_phrases
+
+logger = logging.getLogger("prerender_tts")
+
+MANIFEST_VERSION = 1
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest.get("entries", {})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Starting from an empty manifest, could not read {path}: {e}")
+    return {}
+
+def write_manifest(path, entries):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "entries": entries}, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def collect_phrases():
+    """Unique (key, text, language_code) for every phrase the API can synthesize."""
+    phrases = {}
+    for word in VOCABULARY_DATA:
+        for text, language_code in tts_phrases(word):
+            key = tts_cache_key(text, language_code, slow=False)
+            phrases[key] = (text, language_code)
+    return phrases
+
+def render(key, text, language_code):
+    audio = synthesize_speech(text, language_code=language_code)
+    return {
+        "file": tts_cache.relative_path(key),
+        "text": text,
+        "lang": language_code,
+        "bytes": len(audio),
+        "duration_ms": mp3_duration_ms(audio),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render TTS audio for the vocabulary.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent gTTS requests")
+    parser.add_argument("--manifest", default=settings.TTS_MANIFEST_PATH, help="Manifest output path")
+    parser.add_argument("--prune", action="store_true", help="Delete audio for phrases no longer in the vocabulary")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+
+    if not tts_cache.cache_dir:
+        logger.error("TTS_CACHE_DIR is not set; nothing to pre-render into")
+        return 1
+
+    previous = load_manifest(args.manifest)
+    phrases = collect_phrases()
+
+    entries = {}
+    pending = {}
+    for key, (text, language_code) in phrases.items():
+        if key in previous and tts_cache.contains(key):
+            entries[key] = previous[key]
+        else:
+            pending[key] = (text, language_code)
+
+    logger.info(f"{len(phrases)} phrases, {len(entries)} up to date, {len(pending)} to render")
+
+    started = time.perf_counter()
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(render, key, text, language_code): key
+            for key, (text, language_code) in pending.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            text, language_code = pending[key]
+            try:
+                entries[key] = future.result()
+            except Exception as e:
+                failures += 1
+                logger.error(f"Failed to render '{text}' ({language_code}): {e}")
+
+    stale = set(previous) - set(phrases)
+    if args.prune:
+        for key in stale:
+            try:
+                os.unlink(os.path.join(tts_cache.cache_dir, tts_cache.relative_path(key)))
+            except FileNotFoundError:
+                pass
+
+    write_manifest(args.manifest, entries)
+    logger.info(
+        f"Rendered {len(pending) - failures} phrases in {time.perf_counter() - started:.1f}s, "
+        f"dropped {len(stale)} stale entries, {failures} failures; manifest at {args.manifest}"
+    )
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import, so point every on-disk store at a scratch directory first
+_scratch = tempfile.mkdtemp(prefix="studai-tests-")
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_scratch, "tts"))
+os.environ.setdefault("TTS_MANIFEST_PATH", os.path.join(_scratch, "manifest.json"))
+os.environ.setdefault("SRS_DB_PATH", os.path.join(_scratch, "srs.sqlite3"))
+os.environ.setdefault("VOCAB_SNAPSHOT_PATH", os.path.join(_scratch, "vocabulary.snapshot"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
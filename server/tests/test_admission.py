@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from core.admission import AdmissionController, Overloaded, Priority
+
+MAX_WAIT_MS = {"critical": 5000, "normal": 2000, "speculative": 500}
+
+def controller(max_concurrent=1, max_queue=8, budgets=None, max_wait_ms=MAX_WAIT_MS):
+    return AdmissionController(max_concurrent, max_queue, budgets or {}, max_wait_ms)
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+def test_free_slot_is_granted_without_queueing():
+    async def scenario():
+        gate = controller(max_concurrent=2)
+        first = await gate.acquire("next_word")
+        second = await gate.acquire("check_answer")
+        assert gate.snapshot()["in_flight"] == {"next_word": 1, "check_answer": 1}
+        first.release()
+        second.release()
+        assert gate.stats["queued"] == {}
+    asyncio.run(scenario())
+
+def test_freed_slot_goes_to_the_highest_priority_waiter():
+    async def scenario():
+        gate = controller()
+        held = await gate.acquire("next_word")
+        prefetch = asyncio.create_task(gate.acquire("next_words"))
+        await settle()
+        answer = asyncio.create_task(gate.acquire("check_answer"))
+        await settle()
+
+        held.release()
+        await settle()
+        assert answer.done() and not prefetch.done()
+        (await answer).release()
+        await settle()
+        (await prefetch).release()
+    asyncio.run(scenario())
+
+def test_full_queue_displaces_a_lower_priority_waiter():
+    async def scenario():
+        gate = controller(max_queue=1)
+        held = await gate.acquire("next_word")
+        prefetch = asyncio.create_task(gate.acquire("next_words"))
+        await settle()
+        answer = asyncio.create_task(gate.acquire("check_answer"))
+        await settle()
+
+        with pytest.raises(Overloaded) as shed:
+            await prefetch
+        assert shed.value.reason == "displaced by higher priority"
+        assert shed.value.retry_after >= 1
+        held.release()
+        (await answer).release()
+    asyncio.run(scenario())
+
+def test_full_queue_sheds_a_newcomer_of_equal_or_lower_priority():
+    async def scenario():
+        gate = controller(max_queue=1)
+        held = await gate.acquire("next_word")
+        answer = asyncio.create_task(gate.acquire("check_answer"))
+        await settle()
+
+        with pytest.raises(Overloaded) as shed:
+            await gate.acquire("next_words")
+        assert shed.value.reason == "queue full"
+        held.release()
+        (await answer).release()
+    asyncio.run(scenario())
+
+def test_sheds_right_away_when_the_estimated_wait_is_over_the_class_limit():
+    async def scenario():
+        gate = controller(max_wait_ms={**MAX_WAIT_MS, "speculative": 10})
+        held = await gate.acquire("next_words")
+        with pytest.raises(Overloaded) as shed:
+            await gate.acquire("next_words", Priority.SPECULATIVE)
+        assert shed.value.reason == "queue wait over deadline"
+        assert gate.snapshot()["waiting"] == {}
+        held.release()
+    asyncio.run(scenario())
+
+def test_waiter_is_shed_once_it_has_waited_its_class_limit():
+    async def scenario():
+        gate = controller(max_wait_ms={**MAX_WAIT_MS, "critical": 600})
+        held = await gate.acquire("check_answer")
+        with pytest.raises(Overloaded) as shed:
+            await gate.acquire("check_answer")
+        assert shed.value.reason == "waited past deadline"
+        held.release()
+        # The abandoned wait didn't keep a slot
+        (await gate.acquire("check_answer")).release()
+    asyncio.run(scenario())
+
+def test_endpoint_budget_doesnt_block_other_endpoints():
+    async def scenario():
+        gate = controller(max_concurrent=4, budgets={"next_words": 1})
+        held = await gate.acquire("next_words")
+        other = await asyncio.wait_for(gate.acquire("check_answer"), 0.1)
+        other.release()
+        held.release()
+    asyncio.run(scenario())
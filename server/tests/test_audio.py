@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import core.audio
+from core.executors import StagePool
+from core.resilience import DeadlineExceeded, _deadline
+
+class HangingTTS:
+    """gTTS against an upstream that never answers: blocks until its request timeout, like requests does."""
+
+    timeouts = []
+    released = threading.Event()
+
+    def __init__(self, text, lang="iw", slow=False, timeout=None):
+        self.text = text
+        self.timeout = timeout
+        HangingTTS.timeouts.append(timeout)
+
+    def write_to_fp(self, fp):
+        if self.text.startswith("hang"):
+            threading.Event().wait(self.timeout)
+            HangingTTS.released.set()
+            raise TimeoutError("read timed out")
+        fp.write(b"audio")
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    pool = StagePool("tts", 1, 0)
+    monkeypatch.setattr(core.audio, "tts_pool", pool)
+    monkeypatch.setattr(core.audio, "gTTS", HangingTTS)
+    yield pool
+    pool.shutdown()
+
+def test_hung_synthesis_gives_its_worker_back(one_worker):
+    async def scenario():
+        _deadline.set(time.monotonic() + 0.2)
+        # Whichever gives up first: the request's deadline or gTTS's own timeout
+        with pytest.raises((DeadlineExceeded, TimeoutError)):
+            await core.audio.speak(f"hang {time.time()}")
+        # The request's remaining budget went to gTTS, not an unbounded wait
+        assert 0 < HangingTTS.timeouts[-1] <= 0.2
+
+        assert HangingTTS.released.wait(1.0)
+        for _ in range(100):
+            if one_worker.snapshot()["active"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert one_worker.snapshot()["active"] == 0
+
+        # The only worker is free again for the next cache miss
+        _deadline.set(time.monotonic() + 1.0)
+        assert await core.audio.speak(f"hello {time.time()}") == b"audio"
+    asyncio.run(scenario())
+
+def test_synthesis_without_a_budget_still_times_out(monkeypatch):
+    monkeypatch.setattr(core.audio, "gTTS", HangingTTS)
+    monkeypatch.setattr(core.audio.settings, "TTS_TIMEOUT", 0.05)
+    with pytest.raises(TimeoutError):
+        core.audio.synthesize_speech(f"hang {time.time()}")
+    assert HangingTTS.timeouts[-1] == 0.05
+
+def test_a_cold_miss_is_counted_once(one_worker):
+    async def scenario():
+        text = f"count {time.time()}"
+        before = core.audio.tts_cache.snapshot()
+        assert await core.audio.speak(text) == b"audio"
+        assert await core.audio.speak(text) == b"audio"
+        after = core.audio.tts_cache.snapshot()
+        assert after["misses"] - before["misses"] == 1
+        assert after["memory_hits"] - before["memory_hits"] == 1
+    asyncio.run(scenario())
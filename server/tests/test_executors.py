@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+from core.executors import StagePool
+
+def test_cancelled_queued_call_gives_its_queue_slot_back():
+    async def scenario():
+        pool = StagePool("test", max_workers=1, max_queue=2)
+        release = threading.Event()
+        try:
+            busy = asyncio.create_task(pool.run(release.wait))
+            waiting = [asyncio.create_task(pool.run(lambda: None)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert pool.snapshot()["queued"] == 2
+
+            for task in waiting:
+                task.cancel()
+            await asyncio.gather(*waiting, return_exceptions=True)
+            assert pool.snapshot()["queued"] == 0
+
+            release.set()
+            await busy
+            snapshot = pool.snapshot()
+            assert (snapshot["queued"], snapshot["active"]) == (0, 0)
+            # The freed slots take new work instead of rejecting it as saturated
+            assert await asyncio.gather(*(pool.run(lambda i=i: i) for i in range(3))) == [0, 1, 2]
+        finally:
+            release.set()
+            pool.shutdown()
+    asyncio.run(scenario())
+
+def test_cancelled_running_call_still_finishes_its_accounting():
+    async def scenario():
+        pool = StagePool("test", max_workers=1, max_queue=0)
+        release = threading.Event()
+        try:
+            running = asyncio.create_task(pool.run(release.wait))
+            await asyncio.sleep(0.05)
+            running.cancel()
+            await asyncio.gather(running, return_exceptions=True)
+            assert pool.snapshot()["active"] == 1  # the thread is still busy
+
+            release.set()
+            for _ in range(100):
+                if pool.snapshot()["active"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            snapshot = pool.snapshot()
+            assert (snapshot["queued"], snapshot["active"]) == (0, 0)
+        finally:
+            release.set()
+            pool.shutdown()
+    asyncio.run(scenario())
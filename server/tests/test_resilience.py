@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+from core.resilience import BackendGuard, CircuitBreaker, CircuitOpen, DeadlineExceeded, _deadline
+
+def breaker(**overrides):
+    options = dict(window=4, min_calls=4, failure_rate=0.5, slow_call=1.0, open_seconds=0.05)
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+def fail(b, times=1, seconds=0.01):
+    for _ in range(times):
+        b.before_call()
+        b.record(False, seconds)
+
+def test_opens_once_enough_calls_fail():
+    b = breaker()
+    fail(b, 3)
+    assert b.state == b.CLOSED  # fewer than min_calls in
+    fail(b)
+    assert b.state == b.OPEN
+    with pytest.raises(CircuitOpen) as refused:
+        b.before_call()
+    assert refused.value.retry_after == 1
+    assert b.stats == {"opened": 1, "rejected": 1}
+
+def test_stays_closed_below_the_failure_rate():
+    b = breaker()
+    for ok in (True, False, True, True, True, False, True):
+        b.before_call()
+        b.record(ok, 0.01)
+    assert b.state == b.CLOSED
+
+def test_slow_calls_count_as_failures():
+    b = breaker()
+    for _ in range(4):
+        b.before_call()
+        b.record(True, 2.0)
+    assert b.state == b.OPEN
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    b = breaker()
+    fail(b, 4)
+    time.sleep(0.06)
+    b.before_call()
+    assert b.state == b.HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        b.before_call()  # only one probe at a time
+    b.record(True, 0.01)
+    assert b.state == b.CLOSED
+    b.before_call()
+
+def test_failed_probe_opens_again():
+    b = breaker()
+    fail(b, 4)
+    time.sleep(0.06)
+    fail(b)
+    assert b.state == b.OPEN
+    assert b.stats["opened"] == 2
+    with pytest.raises(CircuitOpen):
+        b.before_call()
+
+def test_abandoned_probe_frees_the_half_open_slot():
+    b = breaker()
+    fail(b, 4)
+    time.sleep(0.06)
+    b.before_call()
+    b.release_probe()
+    b.before_call()
+    assert b.state == b.HALF_OPEN
+
+def guard():
+    return BackendGuard("test", breaker(min_calls=2, window=2, open_seconds=60))
+
+def test_guard_raises_deadline_exceeded_and_counts_it_against_the_backend():
+    async def scenario():
+        g = guard()
+        for _ in range(2):
+            _deadline.set(time.monotonic() + 0.05)
+            with pytest.raises(DeadlineExceeded):
+                await g.call(lambda budget: asyncio.sleep(1))
+        assert g.stats["deadline_exceeded"] == 2
+        assert g.breaker.state == g.breaker.OPEN
+
+        # Out of budget before the call: refused without calling, and no verdict on the backend
+        _deadline.set(time.monotonic() - 1)
+        with pytest.raises(DeadlineExceeded):
+            await g.call(lambda budget: asyncio.sleep(1))
+        assert g.stats["calls"] == 2
+    asyncio.run(scenario())
+
+def test_guard_refuses_calls_without_calling_an_open_backend():
+    async def scenario():
+        g = guard()
+        calls = []
+
+        async def broken(budget):
+            calls.append(budget)
+            raise ConnectionError("backend down")
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await g.call(broken)
+        with pytest.raises(CircuitOpen):
+            await g.call(broken)
+        assert len(calls) == 2
+        assert g.stats["failures"] == 2
+    asyncio.run(scenario())
+
+def test_guard_hedges_a_slow_call_and_takes_the_first_answer(monkeypatch):
+    monkeypatch.setattr("core.resilience.settings.HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr("core.resilience.settings.HEDGE_MIN_DELAY_MS", 10)
+
+    async def scenario():
+        g = guard()
+        g.latencies.add(0.01)
+        cancelled = []
+
+        async def stuck(budget):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def quick(budget):
+            return "hedge"
+
+        assert await g.call(stuck, hedge=quick) == "hedge"
+        await asyncio.sleep(0)
+        assert cancelled == [True]
+        assert g.stats["hedges"] == 1 and g.stats["hedge_wins"] == 1
+    asyncio.run(scenario())
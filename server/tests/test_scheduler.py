@@ -0,0 +1,36 @@
+import pytest
+
+from core.config import settings
+from core.scheduler import Scheduler, SRSStore
+from data.vocab import WordCategory
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two schedulers over one database, the way separate worker processes share it."""
+    path = str(tmp_path / "srs.sqlite3")
+    stores = [SRSStore(path), SRSStore(path)]
+    yield [Scheduler(store, max_active_sessions=8) for store in stores]
+    for store in stores:
+        store.close()
+
+def test_a_recently_shown_word_is_not_shown_again_by_another_worker(workers):
+    first = workers[0]
+    # A small deck, so a worker that forgot what the other showed would soon repeat a word
+    session = first.create_session(category=WordCategory.NOUN)
+    assert settings.SRS_RECENT_WINDOW < len(session.words) < 3 * settings.SRS_RECENT_WINDOW
+    shown = []
+    for turn in range(10 * settings.SRS_RECENT_WINDOW):
+        worker = workers[turn % 2]
+        shown.append(worker.next_words(session.session_id)[0].hebrew)
+    for index, word in enumerate(shown):
+        assert word not in shown[max(0, index - settings.SRS_RECENT_WINDOW):index]
+
+def test_reviews_from_every_worker_accumulate(workers):
+    first, second = workers
+    session = first.create_session()
+    word = first.next_words(session.session_id)[0]
+    second.get_session(session.session_id)
+    for turn in range(6):
+        workers[turn % 2].record_result(session.session_id, word, False, 0)
+    assert first.store.load_reviews(session.learner_id)[word.hebrew].lapses == 6
+    assert second.get_session(session.session_id).states[word.hebrew].lapses == 6
@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import struct
+
+import pytest
+
+from data.vocab import VOCABULARY_JSON_PATH, load_vocabulary
+from data.vocab_snapshot import _HEADER, SnapshotError, compile_snapshot, is_current, load_snapshot, read_header
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "vocabulary.json"
+    shutil.copy(VOCABULARY_JSON_PATH, path)
+    return str(path)
+
+@pytest.fixture
+def snapshot(source, tmp_path):
+    path = str(tmp_path / "vocabulary.snapshot")
+    compile_snapshot(source, path)
+    return path
+
+def expected_fields(source):
+    with open(source, encoding="utf-8") as f:
+        entries = json.load(f)
+    return [
+        (
+            entry["hebrew"], entry["english"], entry["category"], entry["difficulty"],
+            entry.get("tags") or [], entry.get("notes"), entry.get("pronunciation_guide"),
+            entry.get("example_sentence") or {},
+        )
+        for entry in entries
+    ]
+
+def overwrite(path, offset, data):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+def test_round_trip_matches_the_json(source, snapshot):
+    assert load_snapshot(snapshot) == expected_fields(source)
+    assert is_current(snapshot, source)
+
+def test_edited_source_makes_the_snapshot_stale(source, snapshot):
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert not is_current(snapshot, source)
+
+def test_rejects_a_truncated_file(snapshot):
+    with open(snapshot, "r+b") as f:
+        f.truncate(os.path.getsize(snapshot) - 3)
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot)
+
+def test_rejects_a_truncated_header(snapshot):
+    with open(snapshot, "r+b") as f:
+        f.truncate(_HEADER.size - 1)
+    with pytest.raises(SnapshotError):
+        read_header(snapshot)
+
+def test_rejects_another_format(snapshot):
+    overwrite(snapshot, 0, b"XXXX")
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot)
+
+def test_rejects_a_corrupt_string_table(snapshot):
+    # A stray separator splits one string in two
+    overwrite(snapshot, os.path.getsize(snapshot) - 2, b"\0")
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot)
+
+def test_rejects_a_record_pointing_past_the_string_table(snapshot):
+    overwrite(snapshot, _HEADER.size, struct.pack("=I", 0x7FFFFFFF))
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot)
+
+def test_load_vocabulary_rebuilds_a_corrupt_snapshot(source, snapshot):
+    overwrite(snapshot, _HEADER.size, struct.pack("=I", 0x7FFFFFFF))
+    words = load_vocabulary(source, snapshot)
+    assert [word.hebrew for word in words] == [fields[0] for fields in expected_fields(source)]
+    assert load_snapshot(snapshot) == expected_fields(source)
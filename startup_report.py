@@ -0,0 +1,125 @@
+# startup_report.py
+"""
+Cold-start timing report for the server.
+
+Starts fresh interpreters so nothing is already imported, then prints:
+  - the slowest imports (self and cumulative time, from python -X importtime),
+  - the init phases recorded by core.startup (module loading, vocabulary, app
+    creation, startup events and the background warm-up),
+  - time to first response from a real uvicorn process, the number users notice
+    after scale-to-zero.
+
+    python startup_report.py [--top 25] [--no-serve] [--port 8765]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server")
+
+# Imports the app like uvicorn does, runs its startup events and waits for the warm-up
+PHASES_SCRIPT = """
+import asyncio, json, time
+started = time.perf_counter()
+
+async def run():
+    import main
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        task = getattr(main.app.state, "warm_up_task", None)
+        if task is not None:
+            await task
+    from core.startup import startup_report
+    return {"ready_ms": round((ready - started) * 1000, 1), "phases": startup_report()}
+
+print("STARTUP_REPORT " + json.dumps(asyncio.run(run())))
+"""
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+def collect_phases():
+    """Run the app's startup in a fresh interpreter; returns (import timings, phase report)."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PHASES_SCRIPT],
+        cwd=SERVER_DIR, env=child_env(), capture_output=True, text=True,
+    )
+    report = None
+    for line in process.stdout.splitlines():
+        if line.startswith("STARTUP_REPORT "):
+            report = json.loads(line[len("STARTUP_REPORT "):])
+    if process.returncode != 0 or report is None:
+        sys.stderr.write(process.stderr[-4000:])
+        raise SystemExit(f"Startup failed with exit code {process.returncode}")
+
+    imports = []
+    for line in process.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports, report
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def time_to_first_response(port, path="/api/vocabulary/stats", timeout=60.0):
+    """Seconds from spawning uvicorn until `path` answers 200."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVER_DIR, env=child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise SystemExit(f"uvicorn exited with {process.returncode}: {process.stderr.read().decode(errors='replace')[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"No response from {path} within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def print_report(imports, report, top):
+    print(f"Slowest imports during startup and warm-up (of {len(imports)}), by cumulative time:")
+    print(f"{'cumulative ms':>14}{'self ms':>10}   module")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda item: -item[2])[:top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}   {name}")
+
+    print()
+    print(f"Init phases (import and startup events done after {report['ready_ms']} ms):")
+    print(f"{'start ms':>10}{'duration ms':>13}   phase")
+    for phase in report["phases"]:
+        print(f"{phase['start_ms']:>10}{phase['duration_ms']:>13}   {'  ' * phase['depth']}{phase['phase']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report where server cold-start time goes.")
+    parser.add_argument("--top", type=int, default=25, help="how many imports to list")
+    parser.add_argument("--no-serve", action="store_true", help="skip timing a real uvicorn process")
+    parser.add_argument("--port", type=int, default=None, help="port for the uvicorn run (default: any free port)")
+    args = parser.parse_args()
+
+    imports, report = collect_phases()
+    print_report(imports, report, args.top)
+    if not args.no_serve:
+        seconds = time_to_first_response(args.port or free_port())
+        print()
+        print(f"Time to first response (spawn uvicorn -> 200 from /api/vocabulary/stats): {seconds * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()